@@ -0,0 +1,143 @@
+"""Số liệu tổng hợp cho DASHBOARD, cập nhật dần theo từng dòng thêm/sửa.
+
+Bộ đếm chỉ giữ số hồ sơ theo (ngày nhập, người tuyển, nguồn, trạng thái) nên
+kích thước tăng theo số ngày chứ không theo số hồ sơ: dashboard đọc bảng nhỏ này
+thay vì quét lại toàn bộ DataFrame ở mỗi lần rerun. Phễu tuyển dụng và thời gian
+ở từng bước lấy thêm từ nhật ký thay đổi (history.EventLog).
+"""
+import threading
+from collections import Counter
+
+import pandas as pd
+
+from history import CREATED
+
+KEY_FIELDS = ["NgayNhap", "NguoiTuyen", "Nguồn", "TrangThai"]
+DROPPED = "Loại"          # bị loại: bước đạt được lấy từ trạng thái ngay trước khi loại
+HIRED = "Đã đi làm"
+WORKED = {HIRED, "Nghỉ việc"}    # đã đi làm (kể cả đã nghỉ sau đó)
+
+
+class DashboardStats:
+    """Đăng ký với CandidateStore.add_listener để nhận từng thay đổi."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = Counter()
+        self._idx = [None] * len(KEY_FIELDS)
+        self.version = 0
+        self._frame = None
+        self._frame_version = -1
+
+    def _key(self, values):
+        return tuple(str(values[i]).strip() if i is not None and i < len(values) else "" for i in self._idx)
+
+    def reset(self, header, rows):
+        with self._lock:
+            self._idx = [header.index(f) if f in header else None for f in KEY_FIELDS]
+            self.counts = Counter(map(self._key, rows))
+            self.version += 1
+
+    def apply(self, old, new):
+        with self._lock:
+            if old is not None:
+                k = self._key(old); self.counts[k] -= 1
+                if self.counts[k] <= 0: del self.counts[k]
+            if new is not None: self.counts[self._key(new)] += 1
+            self.version += 1
+
+    def frame(self):
+        """DataFrame [Ngay, NgayNhap, NguoiTuyen, Nguồn, TrangThai, SoLuong] - KHÔNG sửa trực tiếp."""
+        with self._lock:
+            if self._frame_version != self.version:
+                df = pd.DataFrame(list(self.counts), columns=KEY_FIELDS)
+                df["SoLuong"] = list(self.counts.values())
+                df.insert(0, "Ngay", pd.to_datetime(df["NgayNhap"], format="%d/%m/%Y", errors="coerce"))
+                self._frame, self._frame_version = df, self.version
+            return self._frame
+
+
+def in_range(frame, start=None, end=None):
+    """Lọc theo ngày nhập trong [start, end] (date)."""
+    mask = pd.Series(True, index=frame.index)
+    if start: mask &= frame["Ngay"] >= pd.Timestamp(start)
+    if end: mask &= frame["Ngay"] <= pd.Timestamp(end)
+    return frame[mask]
+
+
+def totals(frame, field):
+    return frame.groupby(field)["SoLuong"].sum().sort_values(ascending=False)
+
+
+def daily(frame, by=None):
+    """Số hồ sơ mới theo ngày (cột theo `by` nếu có)."""
+    if frame.empty: return pd.DataFrame()
+    if not by: return frame.groupby("Ngay")["SoLuong"].sum().to_frame("Hồ sơ mới")
+    return frame.pivot_table(index="Ngay", columns=by, values="SoLuong", aggfunc="sum", fill_value=0)
+
+
+def last_status_before(events, status):
+    """{mã hồ sơ: trạng thái ngay trước lần gần nhất chuyển sang `status`}."""
+    moves = events[(events["Truong"] == "TrangThai") & (events["GiaTriMoi"] == status)]
+    return moves.groupby("MaUV")["GiaTriCu"].last().to_dict()
+
+
+def funnel(frame, workflow, rejected_from=None):
+    """Phễu qua các bước của WORKFLOW: số hồ sơ đã đạt tới (ít nhất) mỗi bước.
+
+    rejected_from: {mã hồ sơ: trạng thái trước khi bị loại} của các hồ sơ trong
+    khoảng đang xem mà HIỆN ĐANG bị loại (xem last_status_before); mỗi hồ sơ
+    được tính tới đúng bước của chính nó. Hồ sơ bị loại không có trong nhật ký
+    được tính là mới qua bước 1.
+    """
+    stages = sorted((v["step"], k) for k, v in workflow.items() if v["step"] < max(w["step"] for w in workflow.values()))
+    stages.append((workflow[HIRED]["step"], HIRED))
+    by_status = totals(frame, "TrangThai")
+    reached = Counter()
+    for status, n in by_status.items():
+        if status != DROPPED: reached[workflow.get(status, {}).get("step", 1)] += int(n)
+    n_dropped = int(by_status.get(DROPPED, 0))
+    for prev in (rejected_from or {}).values():
+        reached[workflow.get(prev, {}).get("step", 1)] += 1; n_dropped -= 1
+    reached[1] += max(n_dropped, 0)
+
+    rows, total = [], sum(reached.values())
+    for step, status in stages:
+        n = sum(v for s, v in reached.items() if s >= step)
+        rows.append({"Bước": step, "Trạng thái": status, "Số hồ sơ": n,
+                     "Tỷ lệ (%)": round(100 * n / total, 1) if total else 0.0})
+    return pd.DataFrame(rows)
+
+
+def time_in_stage(events, created_on=None, start=None, end=None):
+    """Trung vị số ngày ở mỗi trạng thái, tính trên các lần chuyển trạng thái trong [start, end].
+
+    Thời điểm vào trạng thái đầu tiên lấy từ sự kiện TaoMoi, nếu không có thì
+    created_on(mã hồ sơ) (ngày nhập, có thể None).
+    """
+    ev = events[events["Truong"].isin(["TrangThai", CREATED])]
+    if ev.empty: return pd.DataFrame(columns=["Trạng thái", "Trung vị (ngày)", "Số lượt"])
+    ev = ev.assign(ts=pd.to_datetime(ev["ThoiGian"], errors="coerce")).sort_values(["MaUV", "ts"], kind="stable")
+    ev = ev.assign(prev=ev.groupby("MaUV")["ts"].shift())
+    moves = ev[ev["Truong"] == "TrangThai"]
+    if created_on is not None and moves["prev"].isna().any():
+        missing = moves.loc[moves["prev"].isna(), "MaUV"].unique()
+        entered = pd.Series({uid: created_on(uid) for uid in missing}, dtype=object)
+        moves = moves.assign(prev=moves["prev"].fillna(moves["MaUV"].map(pd.to_datetime(entered, errors="coerce"))))
+    if start: moves = moves[moves["ts"] >= pd.Timestamp(start)]
+    if end: moves = moves[moves["ts"] < pd.Timestamp(end) + pd.Timedelta(days=1)]
+    moves = moves.assign(days=(moves["ts"] - moves["prev"]).dt.total_seconds() / 86400).dropna(subset=["days"])
+    out = moves.groupby("GiaTriCu")["days"].agg(["median", "size"]).reset_index()
+    out.columns = ["Trạng thái", "Trung vị (ngày)", "Số lượt"]
+    out["Trung vị (ngày)"] = out["Trung vị (ngày)"].round(1)
+    return out
+
+
+def leaderboard(frame):
+    """Xếp hạng người tuyển: số hồ sơ, số đã đi làm, tỷ lệ chuyển đổi."""
+    if frame.empty: return pd.DataFrame(columns=["Người tuyển", "Hồ sơ", "Đã đi làm", "Tỷ lệ (%)"])
+    g = frame.assign(DaDiLam=frame["SoLuong"].where(frame["TrangThai"].isin(WORKED), 0)) \
+             .groupby("NguoiTuyen")[["SoLuong", "DaDiLam"]].sum()
+    g["Tỷ lệ (%)"] = (100 * g["DaDiLam"] / g["SoLuong"]).round(1)
+    g = g.reset_index().rename(columns={"NguoiTuyen": "Người tuyển", "SoLuong": "Hồ sơ", "DaDiLam": "Đã đi làm"})
+    return g.sort_values(["Đã đi làm", "Hồ sơ"], ascending=False, ignore_index=True)
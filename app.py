@@ -1,21 +1,12 @@
 import streamlit as st
-import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import importlib.util
+import os
 import time
 from datetime import datetime, date, timedelta
-import requests
-import base64
-from io import BytesIO
-
-# --- KIỂM TRA THƯ VIỆN WORD ---
-try:
-    from docx import Document
-    from docx.shared import Pt, RGBColor
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-except ImportError:
-    st.error("⚠️ Lỗi: Chưa cài thư viện python-docx. Vui lòng chạy lệnh: pip install python-docx")
-    st.stop()
+# Chỉ nạp những gì màn đăng nhập cần; pandas, gspread, PIL, python-docx... nạp khi dùng tới
+from storage import EVENT_HEADER, GSheetsBackend, MirroredBackend, SQLiteBackend, stored_value
+from auth import UserDirectory
+from perf import RECORDER, Traced, laps, span
 
 # --- CẤU HÌNH HỆ THỐNG ---
 st.set_page_config(page_title="HR System Pro", layout="wide", page_icon="💎")
@@ -32,6 +23,12 @@ WORKFLOW = {
     "Nghỉ việc": {"step": 6, "sla": 0}
 }
 
+# Số hồ sơ hiển thị mỗi trang ở màn DANH SÁCH (có thể chọn lại trên giao diện)
+PAGE_SIZE_OPTIONS = [10, 20, 50, 100]
+DEFAULT_PAGE_SIZE = 20
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
 # Link Apps Script (Giữ nguyên)
 APPS_SCRIPT_URL = "https://script.google.com/macros/s/AKfycbzKueqCnPonJ1MsFzQpQDk7ihgnVVQyNHMUyc_dx6AocsDu1jW1zf6Gr9VgqMD4D00/exec"
 
@@ -62,38 +59,145 @@ st.markdown("""
 @st.cache_resource
 def get_gcp_service():
     try:
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
         scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
         creds = ServiceAccountCredentials.from_json_keyfile_dict(st.secrets["gcp_service_account"], scope)
         client = gspread.authorize(creds)
         return client
     except: return None
 
-client = get_gcp_service()
-if not client: st.error("⚠️ Lỗi kết nối Secrets!"); st.stop()
+# --- CẤU HÌNH LƯU TRỮ ---
+# secrets.toml: [storage] backend = "gsheets" (mặc định) | "sqlite" (chạy offline) | "mirror" (đọc SQLite, ghi Sheets)
+#                         sqlite_path = "hr_data.db", sync_interval = 300, thumb_dir = ".thumb_cache"
+# Biến môi trường HR_STORAGE_BACKEND / HR_SQLITE_PATH ghi đè (tiện cho chạy thử, load test).
+try: STORAGE = dict(st.secrets.get("storage", {}))
+except Exception: STORAGE = {}
+STORAGE_BACKEND = os.environ.get("HR_STORAGE_BACKEND", STORAGE.get("backend", "gsheets"))
+SQLITE_PATH = os.environ.get("HR_SQLITE_PATH", STORAGE.get("sqlite_path", "hr_data.db"))
+
+# Mở file MỘT lần cho cả process (không mở lại ở mỗi lần rerun / mỗi phiên),
+# từng worksheet chỉ được tra khi backend dùng tới lần đầu.
+@st.cache_resource
+def get_spreadsheet():
+    client = get_gcp_service()
+    if not client: st.error("⚠️ Lỗi kết nối Secrets!"); st.stop()
+    try:
+        with span("sheets.open"): return client.open("TuyenDungKCN_Data")
+    except Exception: st.error("⚠️ Không tìm thấy file Excel TuyenDungKCN_Data."); st.stop()
 
-try:
-    sheet_ungvien = client.open("TuyenDungKCN_Data").worksheet("UngVien")
-    sheet_users = client.open("TuyenDungKCN_Data").worksheet("Users")
-except: st.error("⚠️ Không tìm thấy file Excel hoặc Sheet UngVien/Users."); st.stop()
+@st.cache_resource
+def get_worksheet(name):
+    import gspread
+    book = get_spreadsheet()
+    try:
+        with span("sheets.worksheet"): ws = book.worksheet(name)
+    except gspread.WorksheetNotFound:
+        if name != "LichSu": st.error(f"⚠️ Không tìm thấy Sheet {name}."); st.stop()
+        # Nhật ký thay đổi: tự tạo sheet LichSu ở lần chạy đầu
+        ws = book.add_worksheet("LichSu", rows=1000, cols=len(EVENT_HEADER))
+        ws.append_row(EVENT_HEADER)
+    return Traced(ws, f"sheets.{name}")
+
+@st.cache_resource
+def get_backend():
+    # Mọi lời gọi Sheets/SQLite đều được đo (xem trang QUẢN TRỊ)
+    if STORAGE_BACKEND == "sqlite": return Traced(SQLiteBackend(SQLITE_PATH), "sqlite")
+    remote = GSheetsBackend(lambda: get_worksheet("UngVien"), lambda: get_worksheet("Users"), lambda: get_worksheet("LichSu"))
+    if STORAGE_BACKEND == "mirror":
+        backend = MirroredBackend(Traced(SQLiteBackend(SQLITE_PATH), "sqlite"), remote)
+        backend.sync(); backend.start_sync(int(STORAGE.get("sync_interval", 300)))
+        return backend
+    return remote
+
+@st.cache_resource
+def get_user_directory():
+    # Danh bạ tài khoản dùng chung: đăng nhập chỉ tra bộ nhớ, không đọc lại sheet Users
+    return UserDirectory(get_backend())
+
+@st.cache_resource
+def get_candidate_store():
+    # Dùng chung cho mọi phiên: tránh tải lại toàn bộ dữ liệu ở mỗi lần rerun
+    from candidate_store import CandidateStore
+    return CandidateStore(get_backend())
+
+@st.cache_resource
+def get_event_log():
+    # Nhật ký thay đổi dùng chung, chỉ tải thêm dòng mới
+    from history import EventLog
+    return EventLog(get_backend())
+
+@st.cache_resource
+def get_dashboard_stats():
+    # Bộ đếm cho dashboard, store báo từng dòng thêm/sửa nên không phải quét lại cả bảng
+    from analytics import DashboardStats
+    stats = DashboardStats()
+    get_candidate_store().add_listener(stats)
+    return stats
+
+@st.cache_resource(max_entries=1)
+def get_search_index(_df, reloads):
+    # Dựng đầy đủ chỉ khi tải lại toàn bộ dữ liệu; các dòng sửa / thêm sau đó được vá (patch)
+    from search_index import SearchIndex
+    with span("search.build_index"): return SearchIndex(_df)
+
+@st.cache_resource(max_entries=1)
+def get_sla_frame(_df, version, today):
+    # Tính hạn SLA cho toàn bộ bảng một lần mỗi khi dữ liệu đổi hoặc sang ngày mới
+    from sla import add_sla_columns
+    with span("sla.add_columns"): return add_sla_columns(_df, WORKFLOW)
+
+@st.cache_resource(max_entries=8)
+def get_stage_views(_store, _events, _cohort, store_version, events_version, start, end):
+    # Phễu + thời gian ở mỗi bước quét cả nhật ký: chỉ tính lại khi hồ sơ / nhật ký đổi hoặc đổi khoảng ngày
+    from analytics import DROPPED, funnel, last_status_before, time_in_stage
+    with span("dashboard.stage_views"):
+        # Chỉ hồ sơ hiện vẫn bị loại (không tính hồ sơ đã bị loại rồi được xét lại)
+        rejected = {uid: prev for uid, prev in last_status_before(_events, DROPPED).items()
+                    if current_status(_store, uid) == DROPPED and start <= (created_on(_store, uid) or date.min) <= end}
+        return funnel(_cohort, WORKFLOW, rejected), time_in_stage(_events, lambda uid: created_on(_store, uid), start, end)
 
 # --- CÁC HÀM HỖ TRỢ ---
-def upload_via_appsscript(file_obj, file_name):
-    try:
-        file_bytes = file_obj.getvalue()
-        base64_str = base64.b64encode(file_bytes).decode('utf-8')
-        payload = {"base64": base64_str, "filename": file_name, "mimeType": file_obj.type}
-        response = requests.post(APPS_SCRIPT_URL, json=payload)
-        if response.status_code == 200:
-            res_json = response.json()
-            if res_json.get("result") == "success": return res_json.get("link")
-    except: pass
-    return None
-
-def convert_drive_link(link):
-    if "id=" in link:
-        file_id = link.split("id=")[1]
-        return f"https://drive.google.com/thumbnail?id={file_id}&sz=w1000" 
-    return link
+@st.cache_resource
+def get_photo_uploader():
+    from photo_upload import PhotoUploader
+    return PhotoUploader(APPS_SCRIPT_URL)
+
+def queue_photo_upload(store, file_bytes, file_name, candidate_id):
+    """Upload ảnh ở luồng nền rồi điền cột LinkAnh của hồ sơ có mã tương ứng."""
+    from candidate_store import LINK_ANH_COL
+    def on_done(link):
+        if link: store.update_cell(candidate_id, LINK_ANH_COL, link)
+    get_photo_uploader().submit(file_bytes, file_name, on_done)
+
+@st.cache_resource
+def get_thumbnail_cache():
+    # Ảnh thẻ tải một lần ở server, thu nhỏ và lưu đệm (bộ nhớ + đĩa) cho mọi phiên
+    from thumbnail_cache import ThumbnailCache
+    return ThumbnailCache(os.environ.get("HR_THUMB_DIR", STORAGE.get("thumb_dir", ".thumb_cache")))
+
+def docx_ready():
+    """python-docx chỉ được nạp khi xuất file; kiểm tra đã cài chưa mà không nạp."""
+    if importlib.util.find_spec("docx") is None:
+        st.error("⚠️ Lỗi: Chưa cài thư viện python-docx. Vui lòng chạy lệnh: pip install python-docx")
+        return False
+    return True
+
+def word_file(row):
+    # Cùng cách làm sạch dữ liệu với xuất hàng loạt (bỏ dấu ' của SĐT/CCCD)
+    from word_export import render_docx, to_record
+    with span("export.docx"): return render_docx(to_record(row))
+
+def created_on(store, candidate_id):
+    """Ngày nhập của hồ sơ theo mã trong nhật ký (None nếu không rõ)."""
+    values = store.row_values(store.row_for_id(candidate_id) or 0)
+    try: return datetime.strptime(values[0], "%d/%m/%Y").date() if values else None
+    except ValueError: return None
+
+def current_status(store, candidate_id):
+    values = store.row_values(store.row_for_id(candidate_id) or 0)
+    col = store.header.index("TrangThai") if "TrangThai" in store.header else None
+    return values[col].strip() if values and col is not None else None
 
 def parse_date_vn(date_str):
     """Chuyển đổi chuỗi ngày VN sang đối tượng Date"""
@@ -102,52 +206,6 @@ def parse_date_vn(date_str):
     except:
         return date(2000, 1, 1) # Mặc định nếu lỗi
 
-def calculate_deadline_status(start_date_str, status):
-    try:
-        if status not in WORKFLOW or WORKFLOW[status]['sla'] == 0:
-            return None, "completed"
-        start_date = datetime.strptime(start_date_str, "%d/%m/%Y")
-        deadline_date = start_date + timedelta(days=WORKFLOW[status]['sla'])
-        days_left = (deadline_date - datetime.now()).days
-        return days_left, deadline_date.strftime("%d/%m/%Y")
-    except: return None, None
-
-def create_word_file(data):
-    doc = Document()
-    style = doc.styles['Normal']; font = style.font; font.name = 'Times New Roman'; font.size = Pt(13)
-    
-    head = doc.add_heading(f"HỒ SƠ ỨNG VIÊN: {data['HoTen']}", 0)
-    head.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    for run in head.runs:
-        run.font.name = 'Times New Roman'; run.font.size = Pt(16); run.font.bold = True; run.font.color.rgb = RGBColor(0, 0, 0)
-
-    def add_line(label, value):
-        p = doc.add_paragraph(); p.paragraph_format.space_after = Pt(6)
-        runner = p.add_run(f"{label}: "); runner.font.name = 'Times New Roman'; runner.font.bold = True
-        runner_val = p.add_run(str(value) if value else ""); runner_val.font.name = 'Times New Roman'
-
-    p_sub = doc.add_paragraph(); p_sub.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run_sub = p_sub.add_run(f"(Vị trí: {data['ViTri']} | Trạng thái: {data['TrangThai']})"); run_sub.font.name = 'Times New Roman'; run_sub.italic = True
-    doc.add_paragraph("")
-
-    h1 = doc.add_heading('I. THÔNG TIN CÁ NHÂN', level=1)
-    for run in h1.runs: run.font.name = 'Times New Roman'; run.font.size = Pt(14); run.font.color.rgb = RGBColor(0,0,0)
-    add_line("Họ và tên", data['HoTen']); add_line("Ngày sinh", data['NamSinh'])
-    add_line("Số điện thoại", data['SDT']); add_line("CCCD", data.get('CCCD', ''))
-    add_line("Quê quán", data['QueQuan'])
-
-    h2 = doc.add_heading('II. THÔNG TIN KHÁC', level=1)
-    for run in h2.runs: run.font.name = 'Times New Roman'; run.font.size = Pt(14); run.font.color.rgb = RGBColor(0,0,0)
-    add_line("Nguồn tuyển dụng", data.get('Nguồn', '')); add_line("Đăng ký xe tuyến", data.get('XeTuyen', ''))
-    add_line("Nhu cầu KTX", data.get('KTX', '')); add_line("Ghi chú hiện tại", data.get('GhiChu', ''))
-
-    doc.add_paragraph("")
-    p_footer = doc.add_paragraph(f"Ngày xuất hồ sơ: {datetime.now().strftime('%d/%m/%Y')}"); p_footer.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    for run in p_footer.runs: run.font.name = 'Times New Roman'; run.font.italic = True; run.font.size = Pt(11)
-
-    buf = BytesIO(); doc.save(buf); buf.seek(0)
-    return buf
-
 # --- SESSION ---
 if 'logged_in' not in st.session_state: st.session_state.logged_in = False
 if 'current_page' not in st.session_state: st.session_state.current_page = "dashboard"
@@ -163,25 +221,38 @@ def login_screen():
             with st.form("login"):
                 u = st.text_input("Username"); p = st.text_input("Password", type="password")
                 if st.form_submit_button("VÀO HỆ THỐNG", use_container_width=True):
-                    users = sheet_users.get_all_records()
-                    for user in users:
-                        if str(user['Username']) == u and str(user['Password']) == p:
+                    directory = get_user_directory()
+                    if directory.locked_out(u): st.error("Sai quá nhiều lần, vui lòng thử lại sau ít phút!")
+                    else:
+                        user = directory.authenticate(u, p)
+                        if user:
                             st.session_state.logged_in = True; st.session_state.user_role = user['Role']
                             st.session_state.user_name = user['HoTen']; st.rerun()
-                    st.error("Sai thông tin!")
+                        st.error("Sai thông tin!")
         with tab2:
             with st.form("reg"):
                 nu = st.text_input("User mới"); np = st.text_input("Pass mới", type="password"); nn = st.text_input("Họ tên")
                 if st.form_submit_button("TẠO TÀI KHOẢN"):
-                    existing = sheet_users.col_values(1)
-                    if nu in existing: st.warning("Tên tồn tại!")
-                    else: sheet_users.append_row([nu, np, "staff", nn]); st.success("OK! Mời đăng nhập.")
+                    if not nu or not np: st.warning("Nhập đủ User và Pass!")
+                    elif not get_user_directory().add(nu, np, "staff", nn): st.warning("Tên tồn tại!")
+                    else: st.success("OK! Mời đăng nhập.")
 
 # --- MAIN APP ---
 def main_app():
-    raw_data = sheet_ungvien.get_all_records()
-    df = pd.DataFrame(raw_data)
-    df.columns = [c.strip() for c in df.columns]
+    # Thư viện nặng nạp sau khi đăng nhập nên màn đăng nhập hiện ngay
+    import pandas as pd
+    from analytics import daily, in_range, leaderboard, totals
+    from bulk_import import BatchWriter, CandidateImporter, count_rows, iter_chunks
+    from candidate_store import ConflictError, SchemaError
+    from history import CREATED, diff_events, make_event
+    from photo_upload import phone_from_filename
+
+    store = get_candidate_store()
+    try:
+        with span("page.load_data"):
+            frame, data_version, (reloads, changed_rows) = store.snapshot()
+            df = get_sla_frame(frame, data_version, date.today())
+    except SchemaError as e: st.error(f"⚠️ {e}"); st.stop()
 
     with st.sidebar:
         st.markdown(f"### 👤 {st.session_state.user_name}")
@@ -189,6 +260,7 @@ def main_app():
         st.markdown("---")
         if st.button("🏠 DASHBOARD"): set_page("dashboard")
         if st.button("📝 NHẬP HỒ SƠ"): set_page("input")
+        if st.button("📥 IMPORT FILE"): set_page("import")
         if st.button("🔍 DANH SÁCH"): set_page("list")
         if st.session_state.user_role == "admin":
             st.markdown("---"); 
@@ -196,34 +268,64 @@ def main_app():
         st.markdown("<br>", unsafe_allow_html=True)
         if st.button("🚪 Đăng xuất"): st.session_state.logged_in = False; st.rerun()
 
+    # Đo từng phần của trang (tên: page.<trang>.<phần>)
+    lap = laps(f"page.{st.session_state.current_page}")
+
     # 1. DASHBOARD
     if st.session_state.current_page == "dashboard":
         st.title("📊 Tổng Quan Tuyển Dụng")
         if not df.empty:
+            stats = get_dashboard_stats().frame()
+            by_status = totals(stats, 'TrangThai')
             c1, c2, c3, c4 = st.columns(4)
-            tt_col = 'TrangThai' if 'TrangThai' in df.columns else None
             
-            with c1: st.metric("Tổng Hồ Sơ", len(df), delta=f"+{len(df[df[tt_col]=='Mới nhận'])} mới")
-            with c2: st.metric("Đã Đi Làm", len(df[df[tt_col]=='Đã đi làm']) if tt_col else 0)
-            with c3: st.metric("Phỏng Vấn", len(df[df[tt_col]=='Phỏng vấn']) if tt_col else 0)
+            with c1: st.metric("Tổng Hồ Sơ", int(stats['SoLuong'].sum()), delta=f"+{int(by_status.get('Mới nhận', 0))} mới")
+            with c2: st.metric("Đã Đi Làm", int(by_status.get('Đã đi làm', 0)))
+            with c3: st.metric("Phỏng Vấn", int(by_status.get('Phỏng vấn', 0)))
             
-            overdue_count = 0
-            if 'NgayNhap' in df.columns and tt_col:
-                for _, row in df.iterrows():
-                    days_left, _ = calculate_deadline_status(row['NgayNhap'], row[tt_col])
-                    if days_left is not None and days_left < 0: overdue_count += 1
+            overdue_count = int(df['QuaHan'].sum())
             with c4: st.metric("⚠️ Quá Hạn", overdue_count, delta_color="inverse")
             
             st.markdown("---")
             col_chart, col_table = st.columns([1, 1])
             with col_chart:
                 st.subheader("Tiến độ")
-                if tt_col: st.bar_chart(df[tt_col].value_counts())
+                st.bar_chart(by_status)
             with col_table:
                 st.subheader("Top Tuyển Dụng")
-                if 'NguoiTuyen' in df.columns:
-                    top = df['NguoiTuyen'].value_counts().reset_index(); top.columns = ['Recruiter', 'Count']
-                    st.dataframe(top, use_container_width=True, hide_index=True)
+                top = totals(stats, 'NguoiTuyen').reset_index(); top.columns = ['Recruiter', 'Count']
+                st.dataframe(top, use_container_width=True, hide_index=True)
+
+            # Chuyển trạng thái trong tuần, lấy từ nhật ký thay đổi
+            week_start = datetime.combine(date.today() - timedelta(days=date.today().weekday()), datetime.min.time())
+            moves = get_event_log().changes("TrangThai", start=week_start)
+            if not moves.empty:
+                st.subheader(f"🔁 Chuyển trạng thái tuần này ({len(moves)})")
+                st.bar_chart(moves['GiaTriMoi'].value_counts())
+
+            # Phân tích theo khoảng ngày nhập hồ sơ (đọc bộ đếm + nhật ký, không quét bảng ứng viên)
+            st.markdown("---"); st.subheader("📈 Phân Tích Theo Thời Gian")
+            today = date.today()
+            period = st.date_input("Khoảng ngày nhập hồ sơ", value=(today - timedelta(days=90), today), key="dash_range")
+            period = list(period) if isinstance(period, (list, tuple)) else [period]
+            start, end = (period + [today])[:2]
+            cohort = in_range(stats, start, end)
+            event_log = get_event_log(); events = event_log.changes()
+            funnel_view, stage_view = get_stage_views(store, events, cohort, data_version, event_log.version, start, end)
+
+            st.write(f"**Hồ sơ mới theo ngày và nguồn** ({int(cohort['SoLuong'].sum())} hồ sơ)")
+            if not cohort.empty: st.line_chart(daily(cohort, 'Nguồn'))
+
+            f1, f2 = st.columns(2)
+            with f1:
+                st.write("**Phễu tuyển dụng**")
+                st.dataframe(funnel_view, use_container_width=True, hide_index=True)
+            with f2:
+                st.write("**Thời gian ở mỗi bước (trung vị)**")
+                st.dataframe(stage_view, use_container_width=True, hide_index=True)
+
+            st.write("**Bảng xếp hạng người tuyển**")
+            st.dataframe(leaderboard(cohort), use_container_width=True, hide_index=True)
 
     # 2. NHẬP LIỆU
     elif st.session_state.current_page == "input":
@@ -255,42 +357,128 @@ def main_app():
             if st.form_submit_button("🚀 LƯU HỒ SƠ", type="primary"):
                 if name and phone:
                     with st.spinner("Đang xử lý..."):
-                        link_drive = ""
-                        if uploaded_file: link_drive = upload_via_appsscript(uploaded_file, f"{name}_{phone}.jpg")
-                        
-                        now_str = datetime.now().strftime("%d/%m/%Y %H:%M")
-                        history_log = f"[{now_str}] {st.session_state.user_name}: Tạo mới hồ sơ."
+                        link_drive = ""  # Ảnh được upload ở luồng nền, LinkAnh điền sau
                         
                         row = [datetime.now().strftime("%d/%m/%Y"), name.upper(), dob.strftime("%d/%m/%Y"), hometown, 
                                f"'{phone}", f"'{cccd}", pos, "Mới nhận", note, source, link_drive, bus, ktx, 
-                               st.session_state.user_name, fb, tt, doc, history_log]
-                        sheet_ungvien.append_row(row)
+                               st.session_state.user_name, fb, tt, doc, "", ""]
+                        cid = store.append_row(row)
+                        get_event_log().append([make_event(cid, st.session_state.user_name, CREATED, "", "Tạo mới hồ sơ")])
+                        if uploaded_file: queue_photo_upload(store, uploaded_file.getvalue(), f"{name}_{phone}.jpg", cid)
                         st.success("✅ Đã thêm hồ sơ!"); time.sleep(1); st.rerun()
                 else: st.error("Thiếu Tên hoặc SĐT!")
 
+        # Upload ảnh hàng loạt: tên file chứa SĐT của ứng viên (vd: 0912345678.jpg)
+        with st.expander("📷 Tải ảnh hàng loạt (theo SĐT trong tên file)"):
+            with st.form("bulk_photos", clear_on_submit=True):
+                photos = st.file_uploader("Chọn nhiều ảnh", type=['jpg','png','jpeg'], accept_multiple_files=True)
+                if st.form_submit_button("📤 Tải lên") and photos:
+                    unmatched = []
+                    for f in photos:
+                        phone_in_name = phone_from_filename(f.name)
+                        cid = store.id_at(store.find_phone(phone_in_name)) if phone_in_name else None
+                        if cid: queue_photo_upload(store, f.getvalue(), f.name, cid)
+                        else: unmatched.append(f.name)
+                    st.success(f"✅ Đã đưa {len(photos) - len(unmatched)} ảnh vào hàng đợi.")
+                    if unmatched: st.warning("Không tìm thấy hồ sơ cho: " + ", ".join(unmatched))
+
+        uploader = get_photo_uploader()
+        if uploader.pending: st.info(f"⏳ Đang tải {uploader.pending} ảnh ở nền...")
+        if uploader.failures:
+            with st.expander(f"⚠️ {len(uploader.failures)} ảnh tải lỗi gần đây"):
+                for fname, err in reversed(uploader.failures): st.write(f"- {fname}: {err}")
+
+    # 2b. IMPORT HÀNG LOẠT TỪ FILE
+    elif st.session_state.current_page == "import":
+        st.header("📥 Import Hồ Sơ Từ File")
+        st.caption("File CSV/Excel cần có cột Họ tên và SĐT. Các cột CCCD, Ngày sinh, Quê quán, Vị trí, Nguồn, Ghi chú, Xe tuyến, KTX, Giấy tờ nếu có sẽ được nhận diện theo tên cột.")
+        with st.form("import_form"):
+            up = st.file_uploader("Chọn file", type=['csv', 'xlsx'])
+            dry_run = st.checkbox("Chỉ kiểm tra, chưa ghi vào hệ thống (dry-run)", value=True)
+            submitted = st.form_submit_button("📥 BẮT ĐẦU", type="primary")
+
+        if submitted and up:
+            data = up.getvalue(); total = count_rows(data, up.name) or 1
+            # Loại trùng với dữ liệu hiện có bằng tập SĐT/CCCD trong bộ nhớ
+            importer = CandidateImporter(df['SDT'] if 'SDT' in df.columns else [], df['CCCD'] if 'CCCD' in df.columns else [],
+                                         st.session_state.user_name, up.name)
+            writer = BatchWriter(store, get_event_log(), st.session_state.user_name, up.name)
+            bar = st.progress(0.0, text="Đang đọc file...")
+            try:
+                for chunk in iter_chunks(data, up.name):
+                    rows = importer.process(chunk)
+                    if rows and not dry_run: writer.write(rows)
+                    bar.progress(min(importer.n_read / total, 1.0), text=f"Đã xử lý {importer.n_read}/{total} dòng")
+                bar.progress(1.0, text="Hoàn tất")
+            except Exception as e: st.error(f"Lỗi: {e}")
+
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Dòng đã đọc", importer.n_read); m2.metric("Hợp lệ", importer.n_valid)
+            m3.metric("Đã ghi vào hệ thống", writer.n_written)
+            if dry_run and importer.n_valid: st.info("Dry-run: chưa ghi dữ liệu. Bỏ chọn ô dry-run rồi chạy lại để import.")
+            if importer.issues:
+                st.subheader(f"⚠️ {len(importer.issues)} dòng cần xem lại")
+                st.dataframe(pd.DataFrame(importer.issues, columns=["Dòng", "Họ tên", "Vấn đề"]), use_container_width=True, hide_index=True)
+
     # 3. DANH SÁCH (TÍNH NĂNG FULL)
     elif st.session_state.current_page == "list":
         st.header("🗂️ Quản Lý Hồ Sơ")
-        if st.button("🔄 Cập nhật dữ liệu"): st.cache_data.clear(); st.rerun()
+        if st.button("🔄 Cập nhật dữ liệu"): get_backend().sync(); store.resync(); st.rerun()
 
         if not df.empty:
             search = st.text_input("🔎 Tìm kiếm:")
-            df_show = df[df.astype(str).apply(lambda x: x.str.contains(search, case=False)).any(axis=1)] if search else df
+            df_show = df.loc[get_search_index(df, reloads).patch(df, data_version, changed_rows).search(search)] if search else df
             
             # Filter
             st_filter = st.multiselect("Lọc trạng thái", list(WORKFLOW.keys()))
             if st_filter: df_show = df_show[df_show['TrangThai'].isin(st_filter)]
+            lap("search")
 
             st.dataframe(df_show[['HoTen', 'SDT', 'ViTri', 'TrangThai']], use_container_width=True, hide_index=True)
+
+            # Xuất Word hàng loạt cho toàn bộ kết quả đang lọc
+            with st.expander(f"📦 Xuất hồ sơ Word hàng loạt ({len(df_show)} hồ sơ đang lọc)"):
+                ex_mode = st.radio("Định dạng", ["ZIP (mỗi hồ sơ một file)", "Một file Word gộp"], horizontal=True)
+                if st.button("⚙️ Tạo file", disabled=df_show.empty) and docx_ready():
+                    from word_export import export_merged, export_zip, to_records
+                    records = to_records(df_show)
+                    bar = st.progress(0.0, text="Đang tạo hồ sơ...")
+                    on_progress = lambda n, total: bar.progress(n / total, text=f"Đã tạo {n}/{total} hồ sơ")
+                    stamp = datetime.now().strftime('%Y%m%d_%H%M')
+                    if ex_mode.startswith("ZIP"):
+                        with export_zip(records, on_progress=on_progress) as zip_file:
+                            st.download_button("⬇️ Tải file ZIP", zip_file, f"HoSo_{stamp}.zip", "application/zip")
+                    else:
+                        st.download_button("⬇️ Tải file Word", export_merged(records, on_progress=on_progress), f"HoSo_{stamp}.docx", DOCX_MIME)
             st.markdown("---")
 
-            for i, row in df_show.iterrows():
+            # Phân trang: chỉ dựng thẻ của các hồ sơ thuộc trang đang xem
+            pc1, pc2, pc3 = st.columns([1, 1, 2])
+            page_size = pc1.selectbox("Số hồ sơ / trang", PAGE_SIZE_OPTIONS, index=PAGE_SIZE_OPTIONS.index(DEFAULT_PAGE_SIZE), key="list_page_size")
+            n_pages = max(1, -(-len(df_show) // page_size))
+            filter_sig = (search, tuple(st_filter), page_size)
+            if st.session_state.get("list_filter_sig") != filter_sig:
+                st.session_state.list_filter_sig = filter_sig; st.session_state.list_page = 1
+            st.session_state.list_page = min(st.session_state.get("list_page", 1), n_pages)
+            page = pc2.number_input(f"Trang (tổng {n_pages})", min_value=1, max_value=n_pages, step=1, key="list_page")
+            start = (page - 1) * page_size; end = min(start + page_size, len(df_show))
+            pc3.caption(f"Hiển thị {start + 1 if len(df_show) else 0}–{end} / {len(df_show)} hồ sơ")
+
+            lap("table")
+
+            # Ảnh trang này tải song song, trang kế tiếp tải trước ở nền
+            thumbs = get_thumbnail_cache()
+            if 'LinkAnh' in df_show.columns:
+                thumbs.prefetch(df_show['LinkAnh'].iloc[start:min(end + page_size, len(df_show))].astype(str))
+
+            # Key widget theo mã hồ sơ: không đổi khi lọc, sang trang hay có dòng mới
+            for _, row in df_show.iloc[start:end].iterrows():
+                cid = row['MaUV']
                 with st.container(border=True):
                     # --- Header ---
                     c1, c2 = st.columns([1, 4])
                     with c1:
-                        raw_link = str(row.get('LinkAnh', ''))
-                        st.image(convert_drive_link(raw_link) if "http" in raw_link else "https://via.placeholder.com/150", width=100)
+                        st.image(thumbs.get(str(row.get('LinkAnh', ''))), width=100)
                     with c2:
                         # TÍNH NĂNG 1: HIỂN THỊ NOTE CẠNH TÊN
                         note_content = row.get('GhiChu', '')
@@ -298,14 +486,18 @@ def main_app():
                         st.markdown(f"### {row['HoTen']} ({row.get('NamSinh', '')}) {note_html}", unsafe_allow_html=True)
                         
                         # Deadline
-                        days_left, deadline_date = calculate_deadline_status(row['NgayNhap'], row['TrangThai'])
-                        sla_txt = f" | Deadline: {deadline_date}" if days_left is not None else ""
+                        sla_txt = f" | Deadline: {row['HanChot']}" if pd.notna(row['ConLai']) else ""
                         st.markdown(f"**{row['ViTri']}** | `{row['TrangThai']}`{sla_txt}")
                         
                         # Progress
                         cur_step = WORKFLOW.get(row['TrangThai'], {}).get('step', 0)
                         st.progress(cur_step / 6, text=f"Tiến độ: Bước {cur_step}/6")
 
+                    # Phần nặng (tab chi tiết, lịch sử, form sửa) chỉ dựng khi mở thẻ
+                    if not st.toggle("Mở hồ sơ", key=f"open_{cid}"): continue
+
+                    row_num = store.row_for_id(cid)
+
                     # --- Tabs ---
                     t1, t2, t3 = st.tabs(["ℹ️ Chi Tiết", "📝 Ghi Chú & Lịch Sử", "⚙️ Chỉnh Sửa & Tác Vụ"])
                     
@@ -318,9 +510,8 @@ def main_app():
                             st.write(f"🚌 Xe: {row.get('XeTuyen', '--')}"); st.write(f"🏨 KTX: {row.get('KTX', '--')}")
                             st.write(f"📄 Giấy tờ: {row.get('GiayTo', '--')}")
                         
-                        if st.button("📄 Tải File Word", key=f"dl_{i}"):
-                             doc_file = create_word_file(row)
-                             st.download_button("Click tải xuống", doc_file, f"{row['HoTen']}.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+                        # File Word chỉ tạo (và python-docx chỉ nạp) khi bấm tải
+                        if docx_ready(): st.download_button("📄 Tải File Word", lambda r=dict(row): word_file(r), f"{row['HoTen']}.docx", DOCX_MIME, key=f"dl_{cid}")
 
                     with t2:
                         st.write("#### Sticky Note hiện tại:")
@@ -329,12 +520,23 @@ def main_app():
                         else:
                             st.info("Chưa có ghi chú nào.")
                             
-                        with st.expander("📜 Xem lịch sử ghi chú & thay đổi"):
-                            st.markdown(str(row.get('LichSu', '')).replace('\n', '<br>'), unsafe_allow_html=True)
+                        # Lịch sử chỉ đọc khi bật xem
+                        if st.toggle("📜 Xem lịch sử ghi chú & thay đổi", key=f"hist_{cid}"):
+                            events = get_event_log().for_candidate(cid)
+                            if events:
+                                st.dataframe(pd.DataFrame(events, columns=EVENT_HEADER).drop(columns="MaUV"), use_container_width=True, hide_index=True)
+                            elif not row.get('LichSu'): st.caption("Chưa có thay đổi nào được ghi nhận.")
+                            if row.get('LichSu'):
+                                st.caption("Lịch sử cũ (trước khi có nhật ký):")
+                                st.text(str(row['LichSu']))
 
                     # --- TAB 3: CHỈNH SỬA TOÀN BỘ (SỬA ĐƯỢC CẢ SĐT & NGÀY SINH) ---
                     with t3:
-                        with st.form(key=f"full_edit_{i}"):
+                        # Ghi nhớ dòng mà người dùng đang xem để phát hiện sửa đồng thời khi lưu
+                        row_values = store.row_values(row_num or 0)
+                        seen_row = st.session_state.get(f"seen_{cid}")
+                        st.session_state[f"seen_{cid}"] = row_values
+                        with st.form(key=f"full_edit_{cid}"):
                             st.write("#### ✏️ Cập nhật thông tin hồ sơ")
                             # 1. Thông tin cá nhân
                             ec1, ec2, ec3 = st.columns(3)
@@ -370,50 +572,45 @@ def main_app():
                             # Nút lưu duy nhất
                             if st.form_submit_button("💾 LƯU TẤT CẢ THAY ĐỔI"):
                                 try:
-                                    # Tìm dòng bằng SĐT CŨ (quan trọng)
-                                    cell = sheet_ungvien.find(str(row['SDT']))
-                                    if cell:
-                                        # Tạo log lịch sử
-                                        now = datetime.now().strftime("%d/%m/%Y %H:%M")
-                                        log_entry = ""
-                                        
-                                        # Kiểm tra thay đổi để ghi log
-                                        if new_status != row['TrangThai']:
-                                            log_entry += f"[{now}] {st.session_state.user_name}: Đổi trạng thái '{row['TrangThai']}' -> '{new_status}'\n"
-                                        
-                                        # TÍNH NĂNG 3: LOG LỊCH SỬ GHI CHÚ
-                                        if new_note != row.get('GhiChu', ''):
-                                            old_n = row.get('GhiChu', '(Trống)')
-                                            log_entry += f"[{now}] {st.session_state.user_name}: Sửa ghi chú: '{old_n}' -> '{new_note}'\n"
-
-                                        if new_phone != str(row['SDT']).replace("'", ""):
-                                             log_entry += f"[{now}] {st.session_state.user_name}: Đổi SĐT từ {row['SDT']} -> {new_phone}\n"
-
-                                        # CẬP NHẬT GOOGLE SHEET (Mapping đúng cột)
+                                    # Dòng tra theo mã hồ sơ (không phụ thuộc SĐT, không gọi find())
+                                    if row_num:
+                                        # CẬP NHẬT GOOGLE SHEET (Mapping đúng cột) - một request duy nhất
                                         # Giả định thứ tự: [Ngay, HoTen, NamSinh, Que, SDT, CCCD, ViTri, TrangThai, GhiChu...]
-                                        sheet_ungvien.update_cell(cell.row, 2, new_name.upper()) # Col 2: Name
-                                        sheet_ungvien.update_cell(cell.row, 3, new_dob.strftime("%d/%m/%Y")) # Col 3: DOB (Mới)
-                                        sheet_ungvien.update_cell(cell.row, 4, new_hometown)     # Col 4: Que
-                                        sheet_ungvien.update_cell(cell.row, 5, f"'{new_phone}")  # Col 5: SDT (Mới)
-                                        sheet_ungvien.update_cell(cell.row, 6, f"'{new_cccd}")   # Col 6: CCCD
-                                        sheet_ungvien.update_cell(cell.row, 7, new_pos)          # Col 7: Pos
-                                        sheet_ungvien.update_cell(cell.row, 8, new_status)       # Col 8: Status
-                                        sheet_ungvien.update_cell(cell.row, 9, new_note)         # Col 9: Note
-                                        
-                                        if log_entry:
-                                            old_hist = row.get('LichSu', '')
-                                            sheet_ungvien.update_cell(cell.row, 18, log_entry + str(old_hist))
-
+                                        changes = {
+                                            2: new_name.upper(),               # Col 2: Name
+                                            3: new_dob.strftime("%d/%m/%Y"),   # Col 3: DOB (Mới)
+                                            4: new_hometown,                   # Col 4: Que
+                                            5: f"'{new_phone}",                # Col 5: SDT (Mới)
+                                            6: f"'{new_cccd}",                 # Col 6: CCCD
+                                            7: new_pos,                        # Col 7: Pos
+                                            8: new_status,                     # Col 8: Status
+                                            9: new_note,                       # Col 9: Note
+                                        }
+                                        old_values = seen_row or row_values
+                                        store.update_row(row_num, old_values, changes)
+                                        # Mỗi ô thực sự đổi là một sự kiện, ghi chung một request
+                                        get_event_log().append(diff_events(cid, st.session_state.user_name, store.header, old_values,
+                                                                           {c: stored_value(v) for c, v in changes.items()}))
                                         st.success("✅ Đã cập nhật thành công!"); time.sleep(1); st.rerun()
-                                    else: st.error("Lỗi: Không tìm thấy hồ sơ gốc (Do SĐT bị thay đổi trên Sheet?).")
+                                    else: st.error("Lỗi: Không tìm thấy hồ sơ gốc, vui lòng bấm 🔄 Cập nhật dữ liệu.")
+                                except ConflictError:
+                                    st.warning("⚠️ Hồ sơ vừa được người khác cập nhật. Dữ liệu đã được tải lại, vui lòng kiểm tra rồi lưu lại.")
                                 except Exception as e: st.error(f"Lỗi: {e}")
 
     # 4. ADMIN
     elif st.session_state.current_page == "admin":
-        st.header("⚙️ Admin"); users = sheet_users.get_all_records(); st.dataframe(users)
+        st.header("⚙️ Admin"); users = get_user_directory().all()
+        st.dataframe([{k: v for k, v in x.items() if k != 'Password'} for x in users])
         with st.form("rl"):
             u = st.selectbox("User", [x['Username'] for x in users]); r = st.selectbox("Role", ["staff", "admin"])
-            if st.form_submit_button("Update"): cell = sheet_users.find(u); sheet_users.update_cell(cell.row, 3, r); st.success("Done!"); st.rerun()
+            if st.form_submit_button("Update"): get_user_directory().update(u, "Role", r); st.success("Done!"); st.rerun()
+
+        st.markdown("---"); st.subheader("⏱️ Hiệu năng")
+        st.caption("Thời gian các lời gọi Sheets/SQLite/Apps Script và các phần của trang trong process hiện tại (từ lúc khởi động hoặc lần xóa gần nhất).")
+        st.dataframe(RECORDER.stats(), use_container_width=True, hide_index=True)
+        if st.button("🧹 Xóa số liệu đo"): RECORDER.reset(); st.rerun()
+
+    lap("render")
 
 if st.session_state.logged_in: main_app()
 else: login_screen()
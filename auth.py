@@ -0,0 +1,127 @@
+"""Đăng nhập: danh bạ tài khoản lưu đệm, mật khẩu băm PBKDF2 và giới hạn số lần sai.
+
+Danh bạ được tải một lần (hết hạn sau TTL) và cập nhật ngay khi có ghi,
+nên mỗi lần đăng nhập chỉ là một lần tra dict thay vì đọc lại cả sheet Users.
+Mật khẩu dạng chữ thường còn sót lại được băm lại ngay khi người dùng đăng nhập đúng.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+from storage import USER_HEADER
+
+HASH_PREFIX = "pbkdf2_sha256"
+ITERATIONS = 200_000
+MAX_FAILURES = 5          # số lần sai tối đa ...
+FAILURE_WINDOW = 300      # ... trong chừng này giây thì khóa tạm tài khoản
+MISS_RELOAD = 15          # giây: tên đăng nhập không có trong bộ đệm thì tải lại danh bạ, tối đa một lần mỗi khoảng này
+
+
+def hash_password(password, salt=None, iterations=ITERATIONS):
+    salt = salt or os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return "$".join([HASH_PREFIX, str(iterations), base64.b64encode(salt).decode(), base64.b64encode(digest).decode()])
+
+
+def is_hashed(stored):
+    return str(stored).startswith(HASH_PREFIX + "$")
+
+
+def verify_password(password, stored):
+    """True nếu đúng mật khẩu. Chấp nhận cả mật khẩu cũ chưa băm (để chuyển đổi dần)."""
+    stored = str(stored)
+    if not is_hashed(stored):
+        return hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
+    _, iterations, salt, digest = stored.split("$")
+    check = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), base64.b64decode(salt), int(iterations))
+    return hmac.compare_digest(check, base64.b64decode(digest))
+
+
+_DUMMY_HASH = hash_password("", salt=b"\0" * 16)
+
+
+class UserDirectory:
+    def __init__(self, backend, ttl=300):
+        self._backend = backend
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._users = {}
+        self._header = USER_HEADER
+        self._loaded_at = 0.0
+        self._failures = defaultdict(deque)
+
+    def _refresh(self, force=False):
+        if force or time.time() - self._loaded_at > self.ttl:
+            users = self._backend.list_users()
+            if users: self._header = list(users[0])
+            self._users = {str(u.get("Username", "")): u for u in users}
+            self._loaded_at = time.time()
+
+    def invalidate(self):
+        with self._lock: self._loaded_at = 0.0
+
+    def all(self):
+        with self._lock:
+            self._refresh()
+            return list(self._users.values())
+
+    def get(self, username):
+        with self._lock:
+            self._refresh()
+            user = self._users.get(str(username))
+            # Tài khoản vừa thêm trên sheet / ở instance khác: tải lại ngay thay vì chờ hết TTL
+            if user is None and time.time() - self._loaded_at > MISS_RELOAD:
+                self._refresh(force=True); user = self._users.get(str(username))
+            return user
+
+    # --- GHI (ghi xuống backend rồi cập nhật bộ đệm) ---
+    def add(self, username, password, role, full_name):
+        with self._lock:
+            self._refresh()
+            if str(username) in self._users: return False
+            values = [username, hash_password(password), role, full_name]
+            self._backend.add_user(values)
+            self._users[str(username)] = dict(zip(self._header, values))
+            return True
+
+    def update(self, username, field, value):
+        with self._lock:
+            if not self._backend.update_user(username, self._header.index(field) + 1, value):
+                self.invalidate(); return False
+            user = self.get(username)
+            if user is not None: user[field] = value
+            return True
+
+    # --- ĐĂNG NHẬP ---
+    def locked_out(self, username):
+        with self._lock:
+            attempts = self._failures.get(str(username))
+            if not attempts: return False
+            while attempts and time.time() - attempts[0] > FAILURE_WINDOW: attempts.popleft()
+            if not attempts: del self._failures[str(username)]
+            return len(attempts) >= MAX_FAILURES
+
+    def _record_failure(self, username):
+        with self._lock:
+            now = time.time()
+            # Bỏ các tên đã hết hạn khóa để bảng không lớn dần theo mọi tên từng gõ sai
+            for name in [n for n, a in self._failures.items() if now - a[-1] > FAILURE_WINDOW]: del self._failures[name]
+            self._failures[str(username)].append(now)
+
+    def authenticate(self, username, password):
+        """Trả về dict tài khoản nếu đúng, None nếu sai hoặc đang bị khóa tạm."""
+        if self.locked_out(username): return None
+        user = self.get(username)
+        # Vẫn băm khi không có tài khoản để thời gian phản hồi không lộ tên đăng nhập
+        ok = verify_password(password, user["Password"] if user else _DUMMY_HASH) and user is not None
+        if not ok:
+            self._record_failure(username)
+            return None
+        with self._lock: self._failures.pop(str(username), None)
+        if not is_hashed(user["Password"]):
+            self.update(username, "Password", hash_password(password))
+        return user
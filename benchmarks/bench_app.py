@@ -0,0 +1,83 @@
+"""Đo các luồng chính của app (dashboard, danh sách, tìm kiếm, mở/lưu hồ sơ, upload ảnh)
+trên Google Sheets / Apps Script giả với 1k / 10k / 100k hồ sơ.
+
+Chạy: python -m benchmarks.bench_app [số_dòng ...] [--latency GIÂY]
+Ví dụ: python -m benchmarks.bench_app 1000 10000 100000 --latency 0.2
+"""
+import argparse
+import os
+import time
+from io import BytesIO
+
+import streamlit as st
+from PIL import Image
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.fakes import FakeAppsScript, install, make_spreadsheet
+from perf import RECORDER
+from photo_upload import PhotoUploader
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+SAVE_PAUSE = 1.0   # app dừng 1 s sau khi lưu để hiện thông báo
+
+
+def _timed(label, fn, results):
+    t0 = time.perf_counter(); at = fn(); elapsed = time.perf_counter() - t0
+    if at is not None and at.exception: raise RuntimeError(f"{label}: {at.exception[0].message}")
+    results.append((label, elapsed))
+    return at
+
+
+def run_app(n, latency):
+    install(make_spreadsheet(n, latency), latency)
+    os.environ["HR_STORAGE_BACKEND"] = "gsheets"
+    st.cache_resource.clear(); RECORDER.reset()
+
+    at = AppTest.from_file(APP, default_timeout=900)
+    at.secrets["gcp_service_account"] = {"type": "service_account"}
+    at.session_state["logged_in"] = True; at.session_state["user_role"] = "admin"
+    at.session_state["user_name"] = "Admin"; at.session_state["current_page"] = "dashboard"
+
+    results = []
+    _timed("dashboard (lần đầu, tải dữ liệu)", at.run, results)
+    _timed("dashboard (đã có bộ đệm)", at.run, results)
+    at.session_state["current_page"] = "list"
+    _timed("danh sách", at.run, results)
+    search = next(t for t in at.text_input if t.label.startswith("🔎"))
+    _timed("tìm kiếm 'nguyen van'", search.set_value("nguyen van").run, results)
+    card = at.toggle[0]
+    _timed("mở hồ sơ", card.set_value(True).run, results)
+    note = next(t for t in at.text_area if t.label.startswith("Nội dung ghi chú"))
+    note.set_value(f"bench {time.time()}")
+    save = next(b for b in at.button if b.label.startswith("💾"))
+    _timed("lưu hồ sơ (trừ 1 s chờ thông báo)", save.click().run, results)
+    results[-1] = (results[-1][0], results[-1][1] - SAVE_PAUSE)
+    return results
+
+
+def run_upload(latency, count=20):
+    img = Image.new("RGB", (2000, 1500), (120, 160, 200)); buf = BytesIO(); img.save(buf, "JPEG")
+    uploader = PhotoUploader("https://script.google.com/fake", adapter=FakeAppsScript(latency))
+    t0 = time.perf_counter()
+    for i in range(count): uploader.upload(buf.getvalue(), f"{i}.jpg")
+    return (time.perf_counter() - t0) / count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sizes", nargs="*", type=int, default=[1_000, 10_000, 100_000])
+    parser.add_argument("--latency", type=float, default=0.0, help="độ trễ giả lập cho mỗi lời gọi Sheets/Apps Script (giây)")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        print(f"\n=== {n} hồ sơ (độ trễ giả lập {args.latency * 1000:.0f} ms/lời gọi) ===")
+        for label, elapsed in run_app(n, args.latency):
+            print(f"{label:<40}{elapsed * 1000:>10.0f} ms")
+        print(f"\n{'span':<40}{'số lần':>8}{'p50 ms':>10}{'p95 ms':>10}")
+        for row in RECORDER.stats()[:15]:
+            print(f"{row['Tên']:<40}{row['Số lần']:>8}{row['p50 (ms)']:>10.1f}{row['p95 (ms)']:>10.1f}")
+    print(f"\nupload ảnh 2000x1500 (thu nhỏ + POST): {run_upload(args.latency) * 1000:.0f} ms/ảnh")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""So sánh tìm kiếm bằng SearchIndex với cách quét str.contains cũ.
+
+Chạy: python -m benchmarks.bench_search [số_dòng]
+"""
+import sys
+import timeit
+
+from benchmarks.synthetic import make_df
+from search_index import SearchIndex
+
+QUERIES = ["nguyen", "NGUYỄN VĂN", "tran thi lan", "0900001", "bac ninh", "ca đêm"]
+
+
+def old_search(df, search):
+    return df[df.astype(str).apply(lambda x: x.str.contains(search, case=False)).any(axis=1)]
+
+
+def main(n=50_000):
+    df = make_df(n)
+    t0 = timeit.default_timer(); index = SearchIndex(df); build = timeit.default_timer() - t0
+    print(f"{n} dòng - dựng chỉ mục: {build * 1000:.0f} ms (một lần mỗi lần tải dữ liệu)")
+    print(f"{'truy vấn':<16}{'str.contains':>16}{'SearchIndex':>16}{'kết quả':>12}")
+    for q in QUERIES:
+        old = min(timeit.repeat(lambda: old_search(df, q), number=1, repeat=3))
+        new = min(timeit.repeat(lambda: index.search(q), number=1, repeat=5))
+        print(f"{q:<16}{old * 1000:>13.1f} ms{new * 1000:>13.3f} ms{len(index.search(q)):>12}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
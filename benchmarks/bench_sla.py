@@ -0,0 +1,55 @@
+"""So sánh add_sla_columns với vòng lặp iterrows + calculate_deadline_status cũ.
+
+Chạy: python -m benchmarks.bench_sla [số_dòng]
+"""
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from benchmarks.synthetic import make_df
+from sla import add_sla_columns
+
+WORKFLOW = {
+    "Mới nhận": {"step": 1, "sla": 2},
+    "Sơ loại":  {"step": 2, "sla": 3},
+    "Phỏng vấn": {"step": 3, "sla": 5},
+    "Chờ kết quả": {"step": 4, "sla": 7},
+    "Đạt / Chờ đi làm": {"step": 5, "sla": 10},
+    "Đã đi làm": {"step": 6, "sla": 0},
+    "Loại": {"step": 6, "sla": 0},
+    "Nghỉ việc": {"step": 6, "sla": 0}
+}
+
+
+def calculate_deadline_status(start_date_str, status):
+    # Bản sao hàm cũ trong app.py (trước khi vector hóa)
+    try:
+        if status not in WORKFLOW or WORKFLOW[status]['sla'] == 0:
+            return None, "completed"
+        start_date = datetime.strptime(start_date_str, "%d/%m/%Y")
+        deadline_date = start_date + timedelta(days=WORKFLOW[status]['sla'])
+        days_left = (deadline_date - datetime.now()).days
+        return days_left, deadline_date.strftime("%d/%m/%Y")
+    except: return None, None
+
+
+def old_overdue_count(df):
+    overdue_count = 0
+    for _, row in df.iterrows():
+        days_left, _ = calculate_deadline_status(row['NgayNhap'], row['TrangThai'])
+        if days_left is not None and days_left < 0: overdue_count += 1
+    return overdue_count
+
+
+def main(n=100_000):
+    df = make_df(n, days=30)
+    old = min(timeit.repeat(lambda: old_overdue_count(df), number=1, repeat=1))
+    new = min(timeit.repeat(lambda: int(add_sla_columns(df, WORKFLOW)["QuaHan"].sum()), number=1, repeat=5))
+    expected, got = old_overdue_count(df), int(add_sla_columns(df, WORKFLOW)["QuaHan"].sum())
+    print(f"{n} dòng - quá hạn: cũ={expected} mới={got}")
+    print(f"iterrows + strptime: {old * 1000:10.1f} ms")
+    print(f"add_sla_columns:     {new * 1000:10.1f} ms  (nhanh hơn {old / new:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,69 @@
+"""Đo thời gian khởi động: từ lúc chạy script tới khi màn đăng nhập hiện, và lần vào trang đầu tiên.
+
+Mỗi phép đo chạy trong một process Python mới (import nguội) với Google Sheets giả
+có độ trễ mạng giả lập, rồi in số lần mở spreadsheet / tra worksheet và các thư viện
+nặng đã phải nạp trước khi màn đăng nhập hiện ra.
+
+Chạy: python -m benchmarks.bench_startup [--latency GIÂY] [--rows N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+HEAVY = ["pandas", "numpy", "docx", "PIL", "oauth2client"]
+
+
+def child(latency, rows):
+    from streamlit.testing.v1 import AppTest
+    from benchmarks.fakes import install, make_spreadsheet
+
+    before = set(sys.modules)
+    book = make_spreadsheet(rows, latency)
+    client = install(book, latency, photos=False)
+    harness = set(sys.modules) - before      # thư viện do chính bộ đo nạp (không tính cho app)
+    os.environ["HR_STORAGE_BACKEND"] = "gsheets"
+
+    at = AppTest.from_file(APP, default_timeout=300)
+    at.secrets["gcp_service_account"] = {"type": "service_account"}
+    loaded_before = set(sys.modules) | harness
+    t0 = time.perf_counter(); at.run(); login = time.perf_counter() - t0
+    if at.exception: raise RuntimeError(at.exception[0].message)
+    login_modules = sorted(m for m in HEAVY if m in set(sys.modules) - loaded_before)
+    calls_at_login = client.opens + book.lookups
+
+    at.session_state["logged_in"] = True; at.session_state["user_role"] = "admin"
+    at.session_state["user_name"] = "Admin"; at.session_state["current_page"] = "dashboard"
+    t0 = time.perf_counter(); at.run(); first_page = time.perf_counter() - t0
+    if at.exception: raise RuntimeError(at.exception[0].message)
+    print(json.dumps({"login": login, "first_page": first_page, "sheet_calls_at_login": calls_at_login,
+                      "sheet_calls_total": client.opens + book.lookups, "login_modules": login_modules}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.3, help="độ trễ giả lập mỗi lần mở file / tra worksheet (giây)")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child: return child(args.latency, args.rows)
+
+    runs = []
+    for _ in range(args.repeat):
+        out = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child",
+                              "--latency", str(args.latency), "--rows", str(args.rows)],
+                             capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = lambda k: min(r[k] for r in runs)
+    print(f"{args.rows} hồ sơ, độ trễ giả lập {args.latency * 1000:.0f} ms/lời gọi, tốt nhất trong {args.repeat} lần")
+    print(f"màn đăng nhập hiện sau:     {best('login') * 1000:>8.0f} ms  "
+          f"(mở file/tra worksheet: {runs[0]['sheet_calls_at_login']}, nạp: {', '.join(runs[0]['login_modules']) or '-'})")
+    print(f"trang đầu sau đăng nhập:   {best('first_page') * 1000:>8.0f} ms  (tổng mở file/tra worksheet: {runs[0]['sheet_calls_total']})")
+
+
+if __name__ == "__main__":
+    main()
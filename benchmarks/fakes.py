@@ -0,0 +1,176 @@
+"""Google Sheets và Apps Script giả, chạy hoàn toàn trong bộ nhớ để đo hiệu năng không cần tài khoản Google.
+
+FakeWorksheet mô phỏng các hàm gspread mà storage.GSheetsBackend dùng (kể cả
+cách Sheets bỏ dấu ' với USER_ENTERED và trả updatedRange khi append).
+latency (giây) được cộng vào mỗi lời gọi để giả lập độ trễ mạng.
+"""
+import json
+import re
+import time
+import uuid
+
+import gspread
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+from requests import Response
+from requests.adapters import BaseAdapter
+
+from auth import hash_password
+from benchmarks.synthetic import HEADER, make_rows
+from storage import EVENT_HEADER, USER_HEADER, stored_value
+
+SPREADSHEET = "TuyenDungKCN_Data"
+
+
+class FakeWorksheet:
+    def __init__(self, title, values, latency=0.0):
+        self.title = title
+        self.values = [list(map(str, r)) for r in values]
+        self.latency = latency
+        self.col_count = max((len(r) for r in self.values), default=26)
+
+    def _wait(self):
+        if self.latency: time.sleep(self.latency)
+
+    def _width(self):
+        return max((len(r) for r in self.values), default=0)
+
+    def _row(self, r, width):
+        return self.values[r][:width] + [""] * (width - len(self.values[r]))
+
+    # --- ĐỌC ---
+    def get_all_values(self):
+        self._wait(); width = self._width()
+        return [self._row(i, width) for i in range(len(self.values))]
+
+    def get(self, range_name):
+        self._wait()
+        start, end = range_name.split(":")
+        r1, c1 = a1_to_rowcol(start)
+        c2 = a1_to_rowcol(end + "1")[1] if end.isalpha() else a1_to_rowcol(end)[1]
+        return [r[c1 - 1:c2] for r in self.values[r1 - 1:]]
+
+    def row_values(self, row):
+        self._wait()
+        values = list(self.values[row - 1]) if row <= len(self.values) else []
+        while values and values[-1] == "": values.pop()   # Sheets bỏ các ô trống cuối dòng
+        return values
+
+    def find(self, query, in_column=None):
+        self._wait()
+        match = query.search if isinstance(query, re.Pattern) else (lambda v: v == query)
+        for i, r in enumerate(self.values, 1):
+            cols = [in_column - 1] if in_column else range(len(r))
+            for j in cols:
+                if j < len(r) and match(r[j]):
+                    return gspread.Cell(i, j + 1, r[j])
+        return None
+
+    # --- GHI ---
+    def _store(self, value, option):
+        return stored_value(value) if option == "USER_ENTERED" else str(value)
+
+    def append_rows(self, rows, value_input_option="RAW"):
+        self._wait()
+        first = len(self.values) + 1
+        self.values.extend([self._store(v, value_input_option) for v in r] for r in rows)
+        width = max(len(r) for r in rows)
+        return {"updates": {"updatedRange": f"{self.title}!A{first}:{rowcol_to_a1(len(self.values), width)}"}}
+
+    def append_row(self, values, value_input_option="RAW"):
+        return self.append_rows([values], value_input_option)
+
+    def _set(self, row, col, value):
+        while len(self.values) < row: self.values.append([])
+        cells = self.values[row - 1]
+        cells.extend([""] * (col - len(cells)))
+        cells[col - 1] = value
+
+    def update_cell(self, row, col, value):
+        self._wait(); self._set(row, col, stored_value(value))
+
+    def batch_update(self, data, value_input_option="RAW"):
+        self._wait()
+        for item in data:
+            r, c = a1_to_rowcol(item["range"].split(":")[0])
+            for i, vals in enumerate(item["values"]):
+                for j, v in enumerate(vals): self._set(r + i, c + j, self._store(v, value_input_option))
+
+    def add_cols(self, n):
+        self._wait(); self.col_count += n
+
+
+class FakeSpreadsheet:
+    def __init__(self, worksheets, latency=0.0):
+        self.worksheets = {ws.title: ws for ws in worksheets}
+        self.latency = latency
+        self.lookups = 0
+
+    def worksheet(self, title):
+        if self.latency: time.sleep(self.latency)
+        self.lookups += 1
+        if title not in self.worksheets: raise gspread.WorksheetNotFound(title)
+        return self.worksheets[title]
+
+    def add_worksheet(self, title, rows=1000, cols=26):
+        ws = self.worksheets[title] = FakeWorksheet(title, [], self.latency)
+        return ws
+
+
+class FakeClient:
+    def __init__(self, spreadsheets, latency=0.0):
+        self.spreadsheets = spreadsheets
+        self.latency = latency
+        self.opens = 0
+
+    def open(self, title):
+        if self.latency: time.sleep(self.latency)   # mở file = tải metadata của cả spreadsheet
+        self.opens += 1
+        if title not in self.spreadsheets: raise gspread.SpreadsheetNotFound(title)
+        return self.spreadsheets[title]
+
+
+class FakeAppsScript(BaseAdapter):
+    """Adapter requests thay cho Apps Script upload ảnh: luôn trả về link Drive giả."""
+
+    def __init__(self, latency=0.0, **kwargs):
+        super().__init__()
+        self.latency = latency
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        if self.latency: time.sleep(self.latency)
+        self.calls += 1
+        resp = Response()
+        resp.status_code = 200
+        resp._content = json.dumps({"result": "success",
+                                    "link": f"https://drive.google.com/open?id={uuid.uuid4().hex}"}).encode()
+        resp.headers["Content-Type"] = "application/json"
+        resp.url, resp.request = request.url, request
+        return resp
+
+    def close(self):
+        pass
+
+
+def make_spreadsheet(n, latency=0.0, seed=0, password="admin"):
+    """Spreadsheet giả có n hồ sơ ngẫu nhiên và tài khoản admin/<password>."""
+    return FakeSpreadsheet([
+        FakeWorksheet("UngVien", [HEADER] + make_rows(n, seed), latency),
+        FakeWorksheet("Users", [USER_HEADER, ["admin", hash_password(password), "admin", "Admin"]], latency),
+        FakeWorksheet("LichSu", [EVENT_HEADER], latency),
+    ], latency)
+
+
+def install(book, latency=0.0, photos=True):
+    """Cho app.py dùng spreadsheet giả: thay gspread.authorize, bỏ qua credentials, Apps Script giả.
+
+    Trả về FakeClient (đếm số lần mở file / tra worksheet).
+    """
+    from oauth2client.service_account import ServiceAccountCredentials
+    client = FakeClient({SPREADSHEET: book}, latency)
+    gspread.authorize = lambda creds: client
+    ServiceAccountCredentials.from_json_keyfile_dict = staticmethod(lambda keyfile, scope: object())
+    if photos:
+        import photo_upload
+        photo_upload.HTTPAdapter = lambda **kwargs: FakeAppsScript(latency)
+    return client
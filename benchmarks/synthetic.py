@@ -0,0 +1,51 @@
+"""Sinh dữ liệu ứng viên giả (đúng 19 cột A:S) để đo hiệu năng không cần Google Sheets."""
+import random
+from datetime import date, timedelta
+
+from storage import CANDIDATE_HEADER as HEADER
+
+HO = ["NGUYỄN", "TRẦN", "LÊ", "PHẠM", "HOÀNG", "HUỲNH", "PHAN", "VŨ", "VÕ", "ĐẶNG", "BÙI", "ĐỖ"]
+DEM = ["VĂN", "THỊ", "HỮU", "ĐỨC", "MINH", "NGỌC", "THANH", "QUỐC"]
+TEN = ["AN", "BÌNH", "CƯỜNG", "DŨNG", "GIANG", "HÀ", "HẢI", "HÙNG", "LAN", "LINH", "MAI", "NAM", "PHONG", "TÂM", "TUẤN", "YẾN"]
+QUE = ["Hà Nội", "Bắc Ninh", "Bắc Giang", "Hải Dương", "Thái Bình", "Nghệ An", "Thanh Hóa", "Nam Định"]
+VI_TRI = ["Công nhân", "Kỹ thuật", "Kho", "Bảo vệ", "Tạp vụ", "Khác"]
+TRANG_THAI = ["Mới nhận", "Sơ loại", "Phỏng vấn", "Chờ kết quả", "Đạt / Chờ đi làm", "Đã đi làm", "Loại", "Nghỉ việc"]
+NGUON = ["Facebook", "Zalo", "Trực tiếp", "Người giới thiệu"]
+RECRUITERS = ["Nguyễn Lan", "Trần Hùng", "Lê Mai", "Phạm Tuấn", "Admin"]
+
+
+def make_rows(n, seed=0, days=365):
+    """Trả về n dòng (list 19 chuỗi) giống dữ liệu form NHẬP HỒ SƠ ghi vào sheet."""
+    rng = random.Random(seed)
+    today = date.today()
+    rows = []
+    for i in range(n):
+        ngay = today - timedelta(days=rng.randint(0, days))
+        who = rng.choice(RECRUITERS)
+        note = rng.choice(["", "", "Hẹn phỏng vấn sáng thứ 2", "Thiếu CCCD", "Muốn làm ca đêm"])
+        rows.append([
+            ngay.strftime("%d/%m/%Y"),
+            f"{rng.choice(HO)} {rng.choice(DEM)} {rng.choice(TEN)}",
+            date(rng.randint(1975, 2006), rng.randint(1, 12), rng.randint(1, 28)).strftime("%d/%m/%Y"),
+            rng.choice(QUE),
+            f"0{rng.choice([3, 8, 9])}{i:08d}",
+            f"0{rng.randint(1, 96):02d}{rng.randint(0, 999999999):09d}",
+            rng.choice(VI_TRI),
+            rng.choice(TRANG_THAI),
+            note,
+            rng.choice(NGUON),
+            "",
+            rng.choice(["Tự túc", "Tuyến A", "Tuyến B"]),
+            rng.choice(["Không", "Có"]),
+            who,
+            "", "",
+            rng.choice(["Chưa có", "Đủ giấy tờ"]),
+            f"[{ngay.strftime('%d/%m/%Y')} 08:00] {who}: Tạo mới hồ sơ.",
+            f"UV{i + 2:06d}",
+        ])
+    return rows
+
+
+def make_df(n, seed=0, days=365):
+    import pandas as pd   # nạp khi cần: bench_startup đo cả thời gian nạp pandas của app
+    return pd.DataFrame(make_rows(n, seed, days), columns=HEADER)
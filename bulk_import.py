@@ -0,0 +1,189 @@
+"""Nhập hồ sơ hàng loạt từ file CSV/Excel (hội chợ việc làm...).
+
+File được đọc theo từng khối, chuẩn hóa về đúng 19 cột A:S như form
+NHẬP HỒ SƠ, loại trùng SĐT/CCCD với dữ liệu đã có và ghi bằng append_rows
+theo từng lô để không vượt hạn mức ghi của Google Sheets.
+"""
+import re
+import time
+from datetime import date, datetime
+from io import BytesIO
+
+import pandas as pd
+
+from history import CREATED, make_event
+from search_index import fold
+
+CHUNK_ROWS = 500          # số dòng đọc mỗi lần
+WRITE_BATCH = 500         # số dòng mỗi lần append_rows
+MIN_WRITE_INTERVAL = 1.1  # giây giữa 2 lần ghi (hạn mức ~60 lần ghi/phút/người dùng)
+
+# Tên cột trong file (đã bỏ dấu, viết thường, bỏ khoảng trắng) -> trường của hồ sơ
+COLUMN_ALIASES = {
+    "HoTen": ["hoten", "hovaten", "ten", "name", "fullname"],
+    "SDT": ["sdt", "sodienthoai", "dienthoai", "phone", "mobile"],
+    "CCCD": ["cccd", "cmnd", "cancuoc", "socccd"],
+    "NamSinh": ["namsinh", "ngaysinh", "dob", "birthday"],
+    "QueQuan": ["quequan", "que", "diachi", "address"],
+    "ViTri": ["vitri", "vitriungtuyen", "position"],
+    "Nguon": ["nguon", "nguontuyendung", "source"],
+    "GhiChu": ["ghichu", "note", "notes"],
+    "XeTuyen": ["xetuyen", "xe"],
+    "KTX": ["ktx", "kytucxa"],
+    "GiayTo": ["giayto"],
+    "FB": ["facebook", "linkfacebook", "fb"],
+    "TikTok": ["tiktok", "linktiktok"],
+}
+_ALIAS_TO_FIELD = {a: f for f, aliases in COLUMN_ALIASES.items() for a in aliases}
+
+DEFAULTS = {"ViTri": "Công nhân", "Nguon": "Trực tiếp", "XeTuyen": "Tự túc", "KTX": "Không", "GiayTo": "Chưa có"}
+
+
+def digits(value):
+    if isinstance(value, float) and value.is_integer(): value = int(value)   # ô số trong Excel
+    return re.sub(r"\D", "", str(value or ""))
+
+
+def normalize_phone(value):
+    """'+84 912 345 678' / 912345678 (Excel mất số 0) -> '0912345678'. Trả '' nếu không hợp lệ."""
+    d = digits(value)
+    if d.startswith("84") and len(d) == 11: d = "0" + d[2:]
+    if len(d) == 9: d = "0" + d
+    return d if len(d) == 10 and d.startswith("0") else ""
+
+
+def normalize_cccd(value):
+    d = digits(value)
+    if len(d) == 11: d = "0" + d     # Excel làm mất số 0 đầu
+    return d if len(d) in (9, 12) else ""
+
+
+def normalize_dob(value):
+    if isinstance(value, (datetime, date, pd.Timestamp)): return value.strftime("%d/%m/%Y")
+    s = str(value or "").strip()
+    if not s or s.lower() == "nan": return ""
+    if re.fullmatch(r"\d{4}", s): return s
+    for fmt in ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d/%m/%y", "%Y-%m-%d %H:%M:%S"):
+        try: return datetime.strptime(s, fmt).strftime("%d/%m/%Y")
+        except ValueError: pass
+    return s
+
+
+def map_columns(columns):
+    """{tên cột trong file: trường hồ sơ} cho các cột nhận diện được."""
+    mapping = {}
+    for col in columns:
+        field = _ALIAS_TO_FIELD.get(re.sub(r"[^a-z0-9]", "", fold(col)))
+        if field and field not in mapping.values(): mapping[col] = field
+    return mapping
+
+
+def iter_chunks(data, file_name, chunksize=CHUNK_ROWS):
+    """Đọc file theo từng khối DataFrame (mọi giá trị là chuỗi, dòng trống giữ là '')."""
+    if file_name.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+        wb = load_workbook(BytesIO(data), read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(c or "").strip() for c in next(rows, [])]
+        buf = []
+        for r in rows:
+            buf.append(["" if v is None else v for v in r][:len(header)])
+            if len(buf) >= chunksize:
+                yield pd.DataFrame(buf, columns=header, dtype=object); buf = []
+        if buf: yield pd.DataFrame(buf, columns=header, dtype=object)
+        wb.close()
+    else:
+        text = data.decode("utf-8-sig", errors="replace")
+        sep = ";" if text[:2000].count(";") > text[:2000].count(",") else ","
+        for chunk in pd.read_csv(BytesIO(text.encode("utf-8")), sep=sep, dtype=str, keep_default_na=False,
+                                 chunksize=chunksize, skipinitialspace=True):
+            yield chunk
+
+
+def count_rows(data, file_name):
+    """Ước lượng số dòng để hiển thị tiến trình."""
+    if file_name.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+        wb = load_workbook(BytesIO(data), read_only=True)
+        n = max((wb.active.max_row or 1) - 1, 0); wb.close()
+        return n
+    return max(data.count(b"\n") - 1, 0) + (0 if data.endswith(b"\n") else 1)
+
+
+class CandidateImporter:
+    """Chuẩn hóa + kiểm tra từng khối; nhớ SĐT/CCCD đã gặp để loại trùng cả trong file."""
+
+    def __init__(self, existing_phones, existing_cccds, user_name, file_name=""):
+        self.phones = {normalize_phone(p) for p in existing_phones} - {""}
+        self.cccds = {normalize_cccd(c) for c in existing_cccds} - {""}
+        self.user_name = user_name
+        self.file_name = file_name
+        self.issues = []      # [(dòng trong file, họ tên, lý do)]
+        self.n_read = 0
+        self.n_valid = 0
+
+    def process(self, chunk):
+        """Trả về danh sách dòng 19 cột hợp lệ của khối (MaUV để trống, store gán khi ghi)."""
+        mapping = map_columns(chunk.columns)
+        missing = {"HoTen", "SDT"} - set(mapping.values())
+        if missing: raise ValueError(f"Không tìm thấy cột bắt buộc: {', '.join(sorted(missing))}")
+        chunk = chunk[list(mapping)].rename(columns=mapping)
+
+        now = datetime.now()
+        today = now.strftime("%d/%m/%Y")
+        out = []
+        for rec in chunk.to_dict("records"):
+            self.n_read += 1
+            line = self.n_read + 1   # +1 cho dòng tiêu đề
+            val = {k: ("" if pd.isna(v) else v) for k, v in rec.items()}
+            name = str(val.get("HoTen", "")).strip()
+            if not name and not str(val.get("SDT", "")).strip(): continue   # dòng trống
+            phone = normalize_phone(val.get("SDT"))
+            cccd = normalize_cccd(val.get("CCCD"))
+            if not name: self.issues.append((line, name, "Thiếu họ tên")); continue
+            if not phone: self.issues.append((line, name, f"SĐT không hợp lệ: {val.get('SDT', '')}")); continue
+            if phone in self.phones: self.issues.append((line, name, f"Trùng SĐT {phone}")); continue
+            if cccd and cccd in self.cccds: self.issues.append((line, name, f"Trùng CCCD {cccd}")); continue
+            if val.get("CCCD") and not cccd: self.issues.append((line, name, f"CCCD không hợp lệ (vẫn nhập, bỏ trống CCCD): {val['CCCD']}"))
+            self.phones.add(phone)
+            if cccd: self.cccds.add(cccd)
+
+            get = lambda f: str(val.get(f) or DEFAULTS.get(f, "")).strip()
+            # Cùng thứ tự cột với form NHẬP HỒ SƠ
+            out.append([today, name.upper(), normalize_dob(val.get("NamSinh")), get("QueQuan"),
+                        f"'{phone}", f"'{cccd}", get("ViTri"), "Mới nhận", get("GhiChu"), get("Nguon"), "",
+                        get("XeTuyen"), get("KTX"), self.user_name, get("FB"), get("TikTok"), get("GiayTo"), "", ""])
+            self.n_valid += 1
+        return out
+
+
+class BatchWriter:
+    """Ghi theo lô WRITE_BATCH dòng, giãn cách MIN_WRITE_INTERVAL giây giữa các lần ghi.
+
+    Nếu có event_log, mỗi lô kèm một append sự kiện "tạo mới" cho các hồ sơ vừa ghi.
+    """
+
+    def __init__(self, store, event_log=None, user_name="", file_name=""):
+        self.store = store
+        self.event_log = event_log
+        self.user_name = user_name
+        self.file_name = file_name
+        self.n_written = 0
+        self._last = 0.0
+
+    def _throttle(self):
+        wait = MIN_WRITE_INTERVAL - (time.monotonic() - self._last)
+        if self._last and wait > 0: time.sleep(wait)
+        self._last = time.monotonic()
+
+    def write(self, rows):
+        for start in range(0, len(rows), WRITE_BATCH):
+            batch = rows[start:start + WRITE_BATCH]
+            self._throttle()
+            ids = self.store.append_rows(batch)
+            self.n_written += len(batch)
+            if self.event_log is not None:
+                now = datetime.now()
+                note = f"Import từ file {self.file_name}"
+                self._throttle()
+                self.event_log.append([make_event(cid, self.user_name, CREATED, "", note, now) for cid in ids])
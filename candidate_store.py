@@ -0,0 +1,255 @@
+"""Kho dữ liệu ứng viên dùng chung cho mọi phiên Streamlit trong cùng một process.
+
+Thay vì gọi get_all_records() ở mỗi lần rerun, dữ liệu được tải một lần,
+sau đó chỉ lấy thêm các dòng mới (khi hết TTL ngắn) và đồng bộ toàn bộ
+khi hết TTL dài. Các thao tác ghi của app được vá thẳng vào bộ nhớ.
+
+Hồ sơ được định danh bằng mã cố định (cột MaUV); bảng mã -> số dòng được
+dựng lại khi tải toàn bộ và bổ sung khi thêm dòng, nên sửa/xuất/khóa widget
+đều tra O(1) thay vì tìm theo SĐT.
+"""
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from storage import CANDIDATE_HEADER, ID_COL, NUM_COLS, SDT_COL, col_letter, legacy_id, stored_value
+
+LINK_ANH_COL = 11
+
+
+class ConflictError(Exception):
+    """Dòng đã bị người khác sửa kể từ lúc được đọc."""
+
+
+class SchemaError(Exception):
+    """Cột MaUV trên sheet đang bị dùng cho dữ liệu khác, không thể gán mã hồ sơ."""
+
+
+def normalize_phone(phone):
+    return str(phone).replace("'", "").strip()
+
+
+def new_id():
+    return "UV" + uuid.uuid4().hex[:10].upper()
+
+
+class CandidateStore:
+    def __init__(self, backend, ttl=60, full_ttl=600):
+        self._backend = backend
+        self.ttl = ttl              # giây: kiểm tra dòng mới
+        self.full_ttl = full_ttl    # giây: tải lại toàn bộ (bắt các sửa đổi từ nơi khác)
+        self._lock = threading.RLock()
+        self.header = []
+        self.rows = []
+        self.version = 0
+        self._df = None
+        self._df_version = -1
+        self._checked_at = 0.0
+        self._synced_at = 0.0
+        self._phone_index = {}
+        self._index_version = -1
+        self._id_index = {}         # MaUV -> số dòng trên sheet
+        self._listeners = []
+        self.reloads = 0            # số lần tải lại toàn bộ
+        self._dirty = set()         # vị trí các dòng đã sửa / thêm từ lần tải lại toàn bộ gần nhất
+
+    def add_listener(self, listener):
+        """Đăng ký bộ tổng hợp cập nhật dần theo dữ liệu.
+
+        listener.reset(header, rows) khi tải lại toàn bộ; listener.apply(old, new) cho
+        từng dòng thêm (old=None) hoặc sửa. Gọi trong khóa của store.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+            if self.header: listener.reset(self.header, self.rows)
+
+    def _notify(self, old, new):
+        for listener in self._listeners: listener.apply(old, new)
+
+    # --- ĐỌC ---
+    def _pad(self, values):
+        values = [str(v) for v in values][:max(len(self.header), NUM_COLS)]
+        return values + [""] * (max(len(self.header), NUM_COLS) - len(values))
+
+    def resync(self):
+        """Tải lại toàn bộ dữ liệu (nút 🔄 Cập nhật dữ liệu)."""
+        with self._lock:
+            header, rows = self._backend.list_candidates()
+            self.header = list(header) + CANDIDATE_HEADER[len(header):NUM_COLS]
+            self.rows = [self._pad(r) for r in rows]
+            self._assign_missing_ids()
+            now = time.time()
+            self._checked_at = self._synced_at = now
+            self.version += 1; self.reloads += 1; self._dirty = set()
+            for listener in self._listeners: listener.reset(self.header, self.rows)
+
+    def _assign_missing_ids(self):
+        """Dựng bảng mã -> số dòng; gán mã cho hồ sơ chưa có và sửa mã trùng, ghi cả cột MaUV một lần.
+
+        Hồ sơ cũ nhận mã theo số dòng. Mã trùng (vd. dòng được copy-paste trên Sheets)
+        giữ ở dòng đầu tiên, các dòng sau nhận mã mới. Không đụng tới cột MaUV nếu
+        tiêu đề cột đó đang là một cột khác.
+        """
+        col = ID_COL - 1
+        if self.header[col].strip() not in ("", CANDIDATE_HEADER[col]):
+            raise SchemaError(f"Cột {col_letter(ID_COL)} của sheet đang là '{self.header[col]}', "
+                              f"cần để trống hoặc đặt tiêu đề {CANDIDATE_HEADER[col]} để lưu mã hồ sơ.")
+        self._id_index, pending = {}, []
+        for i, r in enumerate(self.rows, 2):
+            cid = r[col].strip()
+            if cid and cid not in self._id_index: self._id_index[cid] = i
+            else: pending.append(i)
+        for i in pending:
+            cid = legacy_id(i) if not self.rows[i - 2][col].strip() and legacy_id(i) not in self._id_index else new_id()
+            self.rows[i - 2][col] = cid; self._id_index[cid] = i
+        changed = pending or self.header[col] != CANDIDATE_HEADER[col]
+        if not changed: return
+        self.header[col] = CANDIDATE_HEADER[col]
+        self._backend.write_candidate_ids([self.header[col]] + [r[col] for r in self.rows])
+
+    def _extend(self, rows):
+        start = len(self.rows)
+        self.rows.extend(self._pad(r) for r in rows)
+        for i, r in enumerate(self.rows[start:], start + 2):
+            if not r[ID_COL - 1]: r[ID_COL - 1] = legacy_id(i)   # dòng thêm từ nơi khác bằng bản cũ của app
+            if r[ID_COL - 1] in self._id_index:
+                # Dòng copy-paste trên Sheets mang mã của hồ sơ khác: cấp mã mới cho dòng này
+                r[ID_COL - 1] = new_id()
+                self._backend.update_candidate_cells(i, {ID_COL: r[ID_COL - 1]})
+            self._id_index[r[ID_COL - 1]] = i
+            self._notify(None, r)
+        self._dirty.update(range(start, len(self.rows)))
+        self.version += 1
+
+    def _fetch_new_rows(self):
+        new_rows = self._backend.candidates_since(len(self.rows) + 2)
+        if new_rows: self._extend(new_rows)
+        self._checked_at = time.time()
+
+    def refresh(self):
+        with self._lock:
+            now = time.time()
+            if not self.header or now - self._synced_at > self.full_ttl: self.resync()
+            elif now - self._checked_at > self.ttl: self._fetch_new_rows()
+
+    def df(self):
+        """DataFrame dùng chung - KHÔNG được sửa trực tiếp (chỉ lọc/copy)."""
+        return self.snapshot()[0]
+
+    def snapshot(self):
+        """(DataFrame, version, (reloads, vị trí các dòng đổi)) lấy cùng lúc trong khóa.
+
+        Dùng làm khóa cho các bộ đệm dựng từ DataFrame: đọc store.version sau df() có thể lấy
+        version mới hơn dữ liệu (upload nền, phiên khác vừa ghi) và bộ đệm sẽ giữ DataFrame cũ
+        dưới version mới. Phần tử cuối cho phép vá bộ đệm (chỉ mục tìm kiếm) thay vì dựng lại:
+        các dòng đã sửa / thêm kể từ lần tải lại toàn bộ thứ `reloads`.
+        """
+        with self._lock:
+            self.refresh()
+            if self._df_version != self.version:
+                self._df = pd.DataFrame(self.rows, columns=self.header) if self.header else pd.DataFrame()
+                self._df_version = self.version
+            return self._df, self._df_version, (self.reloads, tuple(sorted(self._dirty)))
+
+    def row_for_id(self, candidate_id):
+        """Số dòng trên sheet theo mã hồ sơ (None nếu không có)."""
+        with self._lock:
+            return self._id_index.get(str(candidate_id))
+
+    def id_at(self, row_num):
+        values = self.row_values(row_num) if row_num else None
+        return values[ID_COL - 1] if values else None
+
+    def row_for_phone(self, phone):
+        """Số dòng trên sheet theo SĐT (tra chỉ mục cục bộ, không gọi find())."""
+        with self._lock:
+            if self._index_version != self.version:
+                col = self.header.index("SDT") if "SDT" in self.header else SDT_COL - 1
+                self._phone_index = {normalize_phone(r[col]): i + 2 for i, r in enumerate(self.rows)}
+                self._index_version = self.version
+            return self._phone_index.get(normalize_phone(phone))
+
+    def find_phone(self, phone):
+        """Như row_for_phone nhưng hỏi backend nếu chỉ mục cục bộ chưa có (hồ sơ vừa thêm từ nơi khác)."""
+        with self._lock:
+            row_num = self.row_for_phone(phone)
+            if row_num is None and normalize_phone(phone):
+                row_num = self._backend.find_by_phone(normalize_phone(phone))
+                if row_num and row_num - 2 >= len(self.rows): self._fetch_new_rows()
+            return row_num
+
+    def row_values(self, row_num):
+        with self._lock:
+            idx = row_num - 2
+            return list(self.rows[idx]) if 0 <= idx < len(self.rows) else None
+
+    # --- GHI (vá thẳng vào bộ nhớ) ---
+    def append_row(self, row):
+        return self.append_rows([row])[0]
+
+    def append_rows(self, rows):
+        """Ghi nhiều dòng trong MỘT request rồi vá vào bộ nhớ. Trả về mã của từng hồ sơ.
+
+        Dòng chưa có MaUV được gán mã mới trước khi ghi.
+        """
+        rows = [self._pad(r) for r in rows]
+        for r in rows:
+            if not r[ID_COL - 1]: r[ID_COL - 1] = new_id()
+        with self._lock:
+            first = self._backend.append_candidates(rows)
+            if first == len(self.rows) + 2:
+                self._extend(rows)   # append mặc định RAW -> lưu nguyên văn
+            else:
+                self._fetch_new_rows()
+            return [r[ID_COL - 1] for r in rows]
+
+    def update_cell(self, candidate_id, col, value):
+        """Ghi một ô của hồ sơ theo mã (luồng nền, vd. LinkAnh). Trả về False nếu hồ sơ không còn.
+
+        Trước khi ghi kiểm tra cột MaUV của dòng trên sheet: nếu dòng đã bị xóa / sắp xếp
+        lại từ lần tải trước thì tải lại toàn bộ rồi tra lại số dòng.
+        """
+        for attempt in range(2):
+            row_num = self.row_for_id(candidate_id)
+            current = self._pad(self._backend.get_candidate_row(row_num)) if row_num else None
+            if current and current[ID_COL - 1] == str(candidate_id):
+                self._backend.update_candidate_cells(row_num, {col: value})
+                self._patch(row_num, {col: value}, current)
+                return True
+            if attempt == 0: self.resync()
+        return False
+
+    def update_row(self, row_num, expected, changes):
+        """Ghi nhiều ô của một dòng trong MỘT request.
+
+        changes: {số cột (1-based): giá trị}. Nếu expected (dòng người dùng đã xem) khác với
+        dữ liệu hiện tại trên sheet ở một trong các cột sắp ghi (hoặc cột MaUV, tức dòng đã
+        bị dời) thì không ghi mà raise ConflictError. Các cột khác (vd. LinkAnh do upload
+        nền điền vào) được phép đổi.
+        """
+        # Đọc / ghi Sheets ngoài khóa: các phiên khác vẫn đọc bộ nhớ trong lúc chờ mạng
+        current = None
+        if expected is not None:
+            current, expected = self._pad(self._backend.get_candidate_row(row_num)), self._pad(expected)
+            if any(current[col - 1] != expected[col - 1] for col in set(changes) | {ID_COL}):
+                self._patch(row_num, {}, current)
+                raise ConflictError(f"Dòng {row_num} đã được cập nhật bởi người khác.")
+        self._backend.update_candidate_cells(row_num, changes)
+        self._patch(row_num, changes, current)
+
+    def _patch(self, row_num, changes, current=None):
+        """Vá bộ nhớ sau khi ghi: current là dòng vừa đọc từ sheet (giữ các cột người khác vừa điền)."""
+        with self._lock:
+            cid = current[ID_COL - 1] if current is not None else None
+            # Bộ nhớ có thể vừa được tải lại trong lúc chờ Sheets: tìm lại dòng theo mã
+            target = self._id_index.get(cid, row_num) if cid else row_num
+            idx = target - 2
+            if not 0 <= idx < len(self.rows): return
+            old = list(self.rows[idx])
+            if current is not None and target == row_num: self.rows[idx] = list(current)
+            for col, value in changes.items(): self.rows[idx][col - 1] = stored_value(value)
+            self._dirty.add(idx)
+            self._notify(old, self.rows[idx])
+            self.version += 1
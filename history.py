@@ -0,0 +1,103 @@
+"""Nhật ký thay đổi hồ sơ (sheet LichSu / bảng lich_su), chỉ ghi thêm.
+
+Mỗi trường bị sửa là một dòng [ThoiGian, MaUV, NguoiSua, Truong, GiaTriCu, GiaTriMoi]
+thay vì nối chuỗi vào ô LichSu của hồ sơ. Các sự kiện của một lần lưu được
+ghi bằng MỘT append; thẻ hồ sơ chỉ đọc lịch sử khi người dùng mở xem.
+"""
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from storage import EVENT_HEADER, legacy_id, stored_value
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"   # dạng ISO -> so sánh chuỗi đúng thứ tự thời gian
+CREATED = "TaoMoi"                # Truong của sự kiện tạo hồ sơ
+
+
+def _event_row(values):
+    row = (list(values) + [""] * len(EVENT_HEADER))[:len(EVENT_HEADER)]
+    # Sự kiện ghi trước khi có MaUV dùng số dòng làm mã hồ sơ
+    if str(row[1]).isdigit(): row[1] = legacy_id(row[1])
+    return row
+
+
+def make_event(candidate_id, user, field, old, new, when=None):
+    return [(when or datetime.now()).strftime(TS_FORMAT), str(candidate_id), user, field,
+            "" if old is None else str(old), "" if new is None else str(new)]
+
+
+def diff_events(candidate_id, user, header, old_values, changes, when=None):
+    """Sự kiện cho các ô thực sự đổi. changes: {số cột (1-based): giá trị đã lưu}.
+
+    Giá trị cũ cũng được đưa về dạng đã lưu: dòng append RAW còn giữ dấu ' (SĐT, CCCD)
+    nên so thẳng sẽ ghi các thay đổi không có thật.
+    """
+    when = when or datetime.now()
+    events = []
+    for col, new in changes.items():
+        old = stored_value(old_values[col - 1]) if old_values and col <= len(old_values) else ""
+        if str(new) != str(old):
+            events.append(make_event(candidate_id, user, header[col - 1] if col <= len(header) else f"Cot{col}", old, new, when))
+    return events
+
+
+class EventLog:
+    """Bộ đệm nhật ký dùng chung giữa các phiên: tải một lần rồi chỉ lấy thêm dòng mới."""
+
+    def __init__(self, backend, ttl=60):
+        self._backend = backend
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self.rows = []
+        self.version = 0
+        self._checked_at = 0.0
+        self._by_candidate = {}
+        self._index_version = -1
+        self._df = None
+        self._df_version = -1
+
+    def _fetch_new_rows(self):
+        new_rows = self._backend.events_since(len(self.rows) + 2)
+        if new_rows:
+            self.rows.extend(map(_event_row, new_rows))
+            self.version += 1
+        self._checked_at = time.time()
+
+    def refresh(self, force=False):
+        with self._lock:
+            if force or time.time() - self._checked_at > self.ttl: self._fetch_new_rows()
+
+    def append(self, events):
+        """Ghi các sự kiện của một lần lưu trong MỘT request."""
+        if not events: return
+        with self._lock:
+            first = self._backend.append_events(events)
+            if first == len(self.rows) + 2:
+                self.rows.extend(map(_event_row, events)); self.version += 1
+            else:
+                self._fetch_new_rows()
+
+    def for_candidate(self, candidate_id):
+        """Sự kiện của một hồ sơ, mới nhất trước."""
+        with self._lock:
+            self.refresh()
+            if self._index_version != self.version:
+                self._by_candidate = {}
+                for r in self.rows: self._by_candidate.setdefault(r[1], []).append(r)
+                self._index_version = self.version
+            return list(reversed(self._by_candidate.get(str(candidate_id), [])))
+
+    def changes(self, field=None, start=None, end=None):
+        """DataFrame các sự kiện lọc theo trường và khoảng thời gian [start, end)."""
+        with self._lock:
+            self.refresh()
+            if self._df_version != self.version:
+                self._df = pd.DataFrame(self.rows, columns=EVENT_HEADER)
+                self._df_version = self.version
+            df = self._df
+        if field: df = df[df["Truong"] == field]
+        if start: df = df[df["ThoiGian"] >= start.strftime(TS_FORMAT)]
+        if end: df = df[df["ThoiGian"] < end.strftime(TS_FORMAT)]
+        return df
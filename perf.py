@@ -0,0 +1,91 @@
+"""Đo thời gian các lời gọi ra ngoài (Sheets, SQLite, Apps Script) và các phần của trang.
+
+Số liệu giữ trong bộ nhớ của process (mỗi tên giữ tối đa SAMPLES lần đo gần nhất)
+và hiện ở trang QUẢN TRỊ với số lần gọi, p50/p95. Chỉ dùng thư viện chuẩn.
+"""
+import functools
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+SAMPLES = 1000
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+class PerfRecorder:
+    def __init__(self, samples=SAMPLES):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=samples))
+        self._counts = defaultdict(int)
+        self._totals = defaultdict(float)
+        self._errors = defaultdict(int)
+
+    def record(self, name, seconds, error=False):
+        with self._lock:
+            self._samples[name].append(seconds)
+            self._counts[name] += 1
+            self._totals[name] += seconds
+            if error: self._errors[name] += 1
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter(); error = False
+        try:
+            yield
+        except Exception:
+            error = True; raise
+        finally:
+            self.record(name, time.perf_counter() - start, error)
+
+    def laps(self, prefix):
+        """Đo liên tiếp các phần của một trang: lap("search") ghi thời gian từ lần lap trước."""
+        last = [time.perf_counter()]
+
+        def lap(name):
+            now = time.perf_counter()
+            self.record(f"{prefix}.{name}", now - last[0]); last[0] = now
+        return lap
+
+    def stats(self):
+        """[{Tên, Số lần, Lỗi, p50 (ms), p95 (ms), Tổng (s)}] sắp theo tổng thời gian."""
+        with self._lock:
+            rows = []
+            for name, samples in self._samples.items():
+                s = sorted(samples)
+                rows.append({"Tên": name, "Số lần": self._counts[name], "Lỗi": self._errors[name],
+                             "p50 (ms)": round(_percentile(s, 0.5) * 1000, 1),
+                             "p95 (ms)": round(_percentile(s, 0.95) * 1000, 1),
+                             "Tổng (s)": round(self._totals[name], 2)})
+        return sorted(rows, key=lambda r: r["Tổng (s)"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear(); self._counts.clear(); self._totals.clear(); self._errors.clear()
+
+
+RECORDER = PerfRecorder()
+span = RECORDER.span
+laps = RECORDER.laps
+
+
+class Traced:
+    """Bọc một đối tượng (worksheet gspread, backend SQLite...): mọi lời gọi hàm được đo với tên prefix.hàm."""
+
+    def __init__(self, obj, prefix, recorder=RECORDER):
+        self._obj = obj
+        self._prefix = prefix
+        self._recorder = recorder
+
+    def __getattr__(self, attr):
+        value = getattr(self._obj, attr)
+        if not callable(value) or attr.startswith("_"): return value
+
+        @functools.wraps(value)
+        def call(*args, **kwargs):
+            with self._recorder.span(f"{self._prefix}.{attr}"):
+                return value(*args, **kwargs)
+        return call
@@ -0,0 +1,101 @@
+"""Tải ảnh ứng viên lên Drive qua Apps Script ở luồng nền.
+
+Ảnh được thu nhỏ về khổ 3x4 trước khi gửi, dùng chung một HTTP session
+(có timeout, thử lại với backoff tăng dần). Form nhập liệu không phải chờ
+upload: dòng được ghi ngay, cột LinkAnh được điền khi upload xong.
+"""
+import base64
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+from requests.adapters import HTTPAdapter
+from PIL import Image, ImageOps
+
+from perf import span
+
+log = logging.getLogger(__name__)
+
+THUMB_SIZE = (300, 400)       # 3x4
+JPEG_QUALITY = 85
+TIMEOUT = (5, 30)             # (kết nối, đọc) - giây
+RETRIES = 3
+BACKOFF = 1.0                 # 1s, 2s, 4s...
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class UploadError(Exception):
+    pass
+
+
+def make_thumbnail(data, size=THUMB_SIZE):
+    """Cắt giữa theo tỉ lệ 3x4, thu nhỏ và nén lại JPEG."""
+    with Image.open(BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        img = ImageOps.fit(img, size, Image.LANCZOS)
+        buf = BytesIO()
+        img.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        return buf.getvalue()
+
+
+def phone_from_filename(file_name):
+    """'0912345678.jpg' / 'NGUYEN VAN A_0912345678.png' -> '0912345678'."""
+    groups = re.findall(r"\d{9,11}", file_name.rsplit(".", 1)[0])
+    return groups[-1] if groups else None
+
+
+class PhotoUploader:
+    def __init__(self, url, max_workers=4, adapter=None):
+        self.url = url
+        self._session = requests.Session()
+        # adapter: thay bằng Apps Script giả khi đo hiệu năng (benchmarks/fakes.py)
+        adapter = adapter or HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self._session.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="photo-upload")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.failures = deque(maxlen=50)   # (tên file, lỗi) gần nhất để hiện trên giao diện
+
+    def upload(self, data, file_name):
+        """Thu nhỏ rồi gửi ảnh (chặn luồng hiện tại). Trả về link Drive hoặc raise UploadError."""
+        payload = {"base64": base64.b64encode(make_thumbnail(data)).decode("utf-8"),
+                   "filename": file_name, "mimeType": "image/jpeg"}
+        error = None
+        for attempt in range(RETRIES + 1):
+            if attempt: time.sleep(BACKOFF * 2 ** (attempt - 1))
+            try:
+                with span("apps_script.post"): resp = self._session.post(self.url, json=payload, timeout=TIMEOUT)
+            except requests.RequestException as e:
+                error = e; continue
+            if resp.status_code in RETRY_STATUS:
+                error = f"HTTP {resp.status_code}"; continue
+            if resp.status_code != 200:
+                raise UploadError(f"HTTP {resp.status_code}")
+            res_json = resp.json()
+            if res_json.get("result") == "success": return res_json.get("link")
+            raise UploadError(res_json.get("message") or str(res_json))
+        raise UploadError(f"Hết {RETRIES} lần thử lại: {error}")
+
+    def submit(self, data, file_name, on_done):
+        """Đưa ảnh vào hàng đợi nền; on_done(link) được gọi ở luồng nền khi upload xong."""
+        with self._lock: self._pending += 1
+
+        def job():
+            try:
+                on_done(self.upload(data, file_name))
+            except Exception as e:
+                log.warning("Upload ảnh %s lỗi: %s", file_name, e)
+                self.failures.append((file_name, str(e)))
+            finally:
+                with self._lock: self._pending -= 1
+
+        return self._pool.submit(job)
+
+    @property
+    def pending(self):
+        return self._pending
@@ -0,0 +1,139 @@
+"""Chỉ mục tìm kiếm cho màn DANH SÁCH.
+
+Dựng đầy đủ một lần cho mỗi lần tải lại toàn bộ dữ liệu, thay cho việc quét
+toàn bộ DataFrame bằng str.contains ở mỗi lần rerun; các dòng sửa / thêm sau
+đó được tách từ lại riêng (patch) nên lưu một hồ sơ không phải dựng lại cả
+chỉ mục. Tìm không dấu ("nguyen" khớp "NGUYỄN"), khớp tiền tố cho SĐT/CCCD
+và trả về kết quả đã xếp hạng.
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+# Trọng số theo cột: khớp tên/SĐT/CCCD được ưu tiên hơn khớp ghi chú, lịch sử
+FIELD_WEIGHTS = {"HoTen": 5, "SDT": 4, "CCCD": 4, "QueQuan": 2, "GhiChu": 1, "LichSu": 0.5}
+PREFIX_FIELDS = ("SDT", "CCCD")
+MIN_PREFIX = 3
+
+_TOKEN_RE = re.compile(r"\w+")
+_MARKS_RE = re.compile("[\u0300-\u036f]")
+
+
+def fold(text):
+    """Bỏ dấu tiếng Việt và chuyển về chữ thường."""
+    return _MARKS_RE.sub("", unicodedata.normalize("NFD", str(text).lower())).replace("đ", "d")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold(text))
+
+
+def _postings(df, positions):
+    """token -> (mảng vị trí dòng, mảng trọng số) của các dòng `positions` (df đã lọc theo các dòng đó),
+    giữ trọng số cao nhất nếu khớp nhiều cột."""
+    parts = []
+    for field, weight in FIELD_WEIGHTS.items():
+        if field not in df.columns: continue
+        # Chỉ tách từ trên các giá trị khác nhau (Quê quán, ghi chú... lặp lại rất nhiều)
+        codes, uniques = pd.factorize(df[field].astype(str))
+        toks = pd.Series([tokenize(u) for u in uniques.tolist()], dtype=object).explode().dropna()
+        pairs = pd.DataFrame({"code": toks.index, "tok": toks.values})
+        rows = pd.DataFrame({"code": codes, "pos": positions})
+        part = rows.merge(pairs, on="code")[["tok", "pos"]]
+        part["w"] = np.float32(weight)
+        parts.append(part)
+    postings = {}
+    if parts:
+        table = pd.concat(parts, ignore_index=True).groupby(["tok", "pos"], sort=True)["w"].max().reset_index()
+        if table.empty: return postings
+        toks = table["tok"].to_numpy(); pos = table["pos"].to_numpy(np.int32); w = table["w"].to_numpy(np.float32)
+        bounds = np.flatnonzero(toks[1:] != toks[:-1]) + 1
+        starts = np.r_[0, bounds]; ends = np.r_[bounds, len(toks)]
+        for s, e in zip(starts, ends):
+            postings[toks[s]] = (pos[s:e], w[s:e])
+    return postings
+
+
+def _numbers(df, positions):
+    """Chuỗi số của SĐT/CCCD đã sắp xếp (để khớp tiền tố bằng tìm kiếm nhị phân) và vị trí dòng tương ứng."""
+    keys, rows = [], []
+    for field in PREFIX_FIELDS:
+        if field not in df.columns: continue
+        digits = df[field].astype(str).str.replace(r"\D", "", regex=True).tolist()
+        for p, d in zip(positions, digits):
+            if d: keys.append(d); rows.append(p)
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return [keys[i] for i in order], np.asarray([rows[i] for i in order], dtype=np.int32)
+
+
+class _Delta:
+    """Chỉ mục nhỏ cho các dòng sửa / thêm sau lần dựng đầy đủ."""
+
+    def __init__(self, df, version, changed):
+        self.version = version
+        self.labels = np.asarray(df.index)
+        self.n = len(df)
+        self.changed = np.asarray(changed, dtype=np.int64)
+        sub = df.iloc[self.changed] if len(self.changed) else df.iloc[:0]
+        self.postings = _postings(sub, self.changed)
+        self.vocab = sorted(self.postings)
+        self.num_keys, self.num_rows = _numbers(sub, self.changed)
+
+
+class SearchIndex:
+    def __init__(self, df):
+        # Dựng đầy đủ một lần; các thay đổi sau đó đi qua patch()
+        positions = np.arange(len(df))
+        self._postings = _postings(df, positions)
+        self._vocab = sorted(self._postings)
+        self._num_keys, self._num_rows = _numbers(df, positions)
+        self._delta = _Delta(df, None, [])
+
+    def patch(self, df, version, changed):
+        """Cập nhật theo df mới: changed là vị trí các dòng đã sửa / thêm kể từ lần dựng đầy đủ.
+
+        Chỉ tách từ lại các dòng đó (chỉ mục phụ); kết quả cũ của chúng trong chỉ mục chính bị che.
+        """
+        if self._delta.version != version: self._delta = _Delta(df, version, changed)
+        return self
+
+    @staticmethod
+    def _add(w, token, is_last, postings, vocab, num_keys, num_rows):
+        if is_last and not token.isdigit():
+            # Token cuối có thể đang gõ dở -> khớp tiền tố
+            lo = bisect_left(vocab, token); hi = bisect_left(vocab, token + "\uffff")
+            matched = vocab[lo:hi]
+        else:
+            matched = [token] if token in postings else []
+        for t in matched:
+            pos, wt = postings[t]
+            w[pos] = np.maximum(w[pos], wt)
+        if token.isdigit() and len(token) >= MIN_PREFIX:
+            lo = bisect_left(num_keys, token); hi = bisect_left(num_keys, token + ":")
+            pos = num_rows[lo:hi]
+            w[pos] = np.maximum(w[pos], max(FIELD_WEIGHTS[f] for f in PREFIX_FIELDS))
+
+    def _match(self, token, is_last, delta):
+        w = np.zeros(delta.n, dtype=np.float32)
+        self._add(w, token, is_last, self._postings, self._vocab, self._num_keys, self._num_rows)
+        w[delta.changed] = 0     # giá trị cũ của các dòng đã sửa
+        self._add(w, token, is_last, delta.postings, delta.vocab, delta.num_keys, delta.num_rows)
+        return w
+
+    def search(self, query, limit=None):
+        """Trả về mảng index của df khớp TẤT CẢ từ khóa, điểm cao trước."""
+        delta = self._delta     # đọc một lần: phiên khác có thể patch() cùng lúc
+        tokens = tokenize(query)
+        if not tokens: return delta.labels
+        total = None
+        for n, tok in enumerate(tokens):
+            w = self._match(tok, n == len(tokens) - 1, delta)
+            if total is None: total = w
+            else: total = np.where((total > 0) & (w > 0), total + w, 0)
+        hits = np.flatnonzero(total)
+        hits = hits[np.argsort(-total[hits], kind="stable")]
+        if limit: hits = hits[:limit]
+        return delta.labels[hits]
@@ -0,0 +1,36 @@
+"""Tính hạn xử lý (SLA) cho toàn bộ DataFrame ứng viên trong một lượt vector hóa.
+
+Thay cho việc gọi calculate_deadline_status + datetime.strptime cho từng dòng:
+dashboard và danh sách cùng đọc các cột ConLai / HanChot / QuaHan.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+def add_sla_columns(df, workflow, now=None):
+    """Trả về bản sao df có thêm các cột:
+
+    - ConLai: số ngày còn lại tới hạn (Int64, <NA> nếu trạng thái không có SLA hoặc ngày lỗi)
+    - HanChot: ngày hạn chót dạng dd/mm/YYYY ("" nếu không có)
+    - QuaHan: True nếu đã quá hạn
+    """
+    now = pd.Timestamp(now or datetime.now())
+    if df.empty or "NgayNhap" not in df.columns or "TrangThai" not in df.columns:
+        return df.assign(ConLai=pd.Series(pd.NA, index=df.index, dtype="Int64"), HanChot="", QuaHan=False)
+
+    start = pd.to_datetime(df["NgayNhap"].astype(str).str.strip(), format="%d/%m/%Y", errors="coerce")
+    sla = df["TrangThai"].map({k: v["sla"] for k, v in workflow.items()}).fillna(0)
+    active = (sla > 0) & start.notna()
+
+    deadline = (start + pd.to_timedelta(sla, unit="D")).where(active)
+    days_left = (deadline - now).dt.days.astype("Int64")
+    # strftime rất chậm -> chỉ định dạng các ngày khác nhau rồi ánh xạ lại
+    codes, uniq = pd.factorize(deadline)
+    labels = np.append(np.asarray(uniq.strftime("%d/%m/%Y"), dtype=object), "")
+    return df.assign(
+        ConLai=days_left,
+        HanChot=labels[codes],
+        QuaHan=(days_left < 0).fillna(False).astype(bool),
+    )
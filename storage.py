@@ -0,0 +1,366 @@
+"""Lớp lưu trữ dữ liệu: Google Sheets, SQLite cục bộ hoặc SQLite + Sheets (mirror).
+
+Mọi thao tác đọc/ghi ứng viên, tài khoản và nhật ký thay đổi đi qua cùng một bộ hàm:
+list_candidates / candidates_since / get_candidate_row / find_by_phone /
+append_candidates / update_candidate_cells / write_candidate_ids / list_users /
+add_user / update_user / append_events / events_since.
+
+Dòng ứng viên được đánh số theo số dòng trên sheet (dòng 1 là tiêu đề,
+dữ liệu bắt đầu từ dòng 2) ở cả hai backend để có thể đồng bộ qua lại.
+Mỗi hồ sơ còn có mã cố định ở cột MaUV (cột cuối) để tra dòng không phụ thuộc SĐT.
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+NUM_COLS = 19          # A:S - đúng thứ tự dòng mà form nhập liệu tạo ra
+LAST_COL = "S"
+SDT_COL = 5
+ID_COL = 19            # MaUV
+CANDIDATE_HEADER = ["NgayNhap", "HoTen", "NamSinh", "QueQuan", "SDT", "CCCD", "ViTri", "TrangThai", "GhiChu",
+                    "Nguồn", "LinkAnh", "XeTuyen", "KTX", "NguoiTuyen", "LinkFB", "LinkTikTok", "GiayTo", "LichSu", "MaUV"]
+USER_HEADER = ["Username", "Password", "Role", "HoTen"]
+# Nhật ký thay đổi (chỉ ghi thêm): mỗi dòng là một trường của một hồ sơ bị đổi
+EVENT_HEADER = ["ThoiGian", "MaUV", "NguoiSua", "Truong", "GiaTriCu", "GiaTriMoi"]
+EVENTS_LAST_COL = "F"
+
+
+def stored_value(value):
+    """Giá trị sau khi Sheets nhận với USER_ENTERED (dấu ' ép kiểu chữ bị bỏ đi)."""
+    value = "" if value is None else str(value)
+    return value[1:] if value.startswith("'") else value
+
+
+def col_letter(col):
+    """1 -> A, 19 -> S, 27 -> AA (không cần nạp gspread chỉ để đổi tên cột)."""
+    letters = ""
+    while col: col, rem = divmod(col - 1, 26); letters = chr(65 + rem) + letters
+    return letters
+
+
+def legacy_id(row_num):
+    """Mã cho hồ sơ tạo trước khi có cột MaUV: suy ra từ số dòng (mọi process gán giống nhau)."""
+    return f"UV{int(row_num):06d}"
+
+
+def _first_row(resp):
+    """Số dòng đầu tiên trong updatedRange của kết quả append ("UngVien!A20:R25" -> 20)."""
+    m = re.search(r"![A-Z]+(\d+)", (resp or {}).get("updates", {}).get("updatedRange", ""))
+    return int(m.group(1)) if m else None
+
+
+class GSheetsBackend:
+    """Mỗi worksheet có thể truyền vào dạng hàm không tham số: chỉ mở khi dùng tới lần đầu."""
+
+    def __init__(self, candidates_ws, users_ws, events_ws=None):
+        self._sheets = {"candidates": candidates_ws, "users": users_ws, "events": events_ws}
+
+    def _sheet(self, name):
+        ws = self._sheets[name]
+        if callable(ws): ws = self._sheets[name] = ws()
+        return ws
+
+    candidates_ws = property(lambda self: self._sheet("candidates"))
+    users_ws = property(lambda self: self._sheet("users"))
+    events_ws = property(lambda self: self._sheet("events"))
+
+    def sync(self):
+        pass   # Sheets là bản gốc, không cần đồng bộ
+
+    def list_candidates(self):
+        values = self.candidates_ws.get_all_values()
+        return ([c.strip() for c in values[0]] if values else []), values[1:]
+
+    def candidates_since(self, row_num):
+        return self.candidates_ws.get(f"A{row_num}:{LAST_COL}")
+
+    def get_candidate_row(self, row_num):
+        return self.candidates_ws.row_values(row_num)
+
+    def find_by_phone(self, phone):
+        cell = self.candidates_ws.find(re.compile(rf"^'?{re.escape(phone)}$"), in_column=SDT_COL)
+        return cell.row if cell else None
+
+    def append_candidates(self, rows):
+        # append mặc định RAW -> giá trị được lưu nguyên văn
+        resp = self.candidates_ws.append_rows(rows) if len(rows) > 1 else self.candidates_ws.append_row(rows[0])
+        return _first_row(resp)
+
+    def update_candidate_cells(self, row_num, changes):
+        """Ghi {số cột: giá trị} của một dòng trong MỘT request batch_update (USER_ENTERED như update_cell)."""
+        runs, run = [], []
+        for col in sorted(changes):
+            if run and col != run[-1] + 1:
+                runs.append(run); run = []
+            run.append(col)
+        if run: runs.append(run)
+        self.candidates_ws.batch_update([
+            {"range": f"{col_letter(cols[0])}{row_num}:{col_letter(cols[-1])}{row_num}",
+             "values": [[changes[c] for c in cols]]}
+            for cols in runs
+        ], value_input_option="USER_ENTERED")
+
+    def write_candidate_ids(self, values):
+        """Ghi cả cột MaUV từ dòng 1 (tiêu đề) trong MỘT request."""
+        if self.candidates_ws.col_count < ID_COL: self.candidates_ws.add_cols(ID_COL - self.candidates_ws.col_count)
+        col = col_letter(ID_COL)
+        self.candidates_ws.batch_update([{"range": f"{col}1:{col}{len(values)}", "values": [[v] for v in values]}],
+                                        value_input_option="RAW")
+
+    def list_users(self):
+        values = self.users_ws.get_all_values()
+        header = [c.strip() for c in values[0]] if values else USER_HEADER
+        return [dict(zip(header, r)) for r in values[1:]]
+
+    def add_user(self, values):
+        self.users_ws.append_row(values)
+
+    def update_user(self, username, col, value):
+        cell = self.users_ws.find(username, in_column=1)
+        if not cell: return False
+        self.users_ws.update_cell(cell.row, col, value)
+        return True
+
+    def append_events(self, events):
+        return _first_row(self.events_ws.append_rows(events)) if events else None
+
+    def events_since(self, row_num):
+        return self.events_ws.get(f"A{row_num}:{EVENTS_LAST_COL}")
+
+
+class SQLiteBackend:
+    """Bản sao cục bộ, có chỉ mục trên SĐT, CCCD, TrangThai và NgayNhap."""
+
+    def __init__(self, path="hr_data.db"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        cols = ", ".join(f"c{i} TEXT NOT NULL DEFAULT ''" for i in range(1, NUM_COLS + 1))
+        self._db.executescript(f"""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS ung_vien (
+                row_num INTEGER PRIMARY KEY, {cols},
+                sdt TEXT GENERATED ALWAYS AS (replace(trim(c5), '''', '')) VIRTUAL,
+                cccd TEXT GENERATED ALWAYS AS (replace(trim(c6), '''', '')) VIRTUAL,
+                ngay_nhap TEXT GENERATED ALWAYS AS (substr(c1, 7, 4) || '-' || substr(c1, 4, 2) || '-' || substr(c1, 1, 2)) VIRTUAL
+            );
+            CREATE INDEX IF NOT EXISTS ix_ung_vien_sdt ON ung_vien(sdt);
+            CREATE INDEX IF NOT EXISTS ix_ung_vien_cccd ON ung_vien(cccd);
+            CREATE INDEX IF NOT EXISTS ix_ung_vien_trang_thai ON ung_vien(c8);
+            CREATE INDEX IF NOT EXISTS ix_ung_vien_ngay_nhap ON ung_vien(ngay_nhap);
+            CREATE TABLE IF NOT EXISTS users (row_num INTEGER PRIMARY KEY, username TEXT UNIQUE, data TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS lich_su (
+                row_num INTEGER PRIMARY KEY, thoi_gian TEXT, ma_uv TEXT, nguoi_sua TEXT,
+                truong TEXT, gia_tri_cu TEXT, gia_tri_moi TEXT
+            );
+            CREATE INDEX IF NOT EXISTS ix_lich_su_ma_uv ON lich_su(ma_uv);
+            CREATE INDEX IF NOT EXISTS ix_lich_su_truong ON lich_su(truong, thoi_gian);
+        """)
+        # File tạo từ phiên bản cũ (ít cột hơn): thêm cột còn thiếu
+        existing = {r[1] for r in self._db.execute("PRAGMA table_info(ung_vien)")}
+        for i in range(1, NUM_COLS + 1):
+            if f"c{i}" not in existing: self._db.execute(f"ALTER TABLE ung_vien ADD COLUMN c{i} TEXT NOT NULL DEFAULT ''")
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS ix_ung_vien_ma_uv ON ung_vien(c{ID_COL})")
+        self._cols = [f"c{i}" for i in range(1, NUM_COLS + 1)]
+
+    @contextmanager
+    def _tx(self):
+        if self._db.in_transaction:
+            yield; return
+        self._db.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK"); raise
+        self._db.execute("COMMIT")
+
+    def _meta(self, key, default):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def _rows(self, sql, params=()):
+        return [list(r) for r in self._db.execute(f"SELECT {', '.join(self._cols)} FROM ung_vien {sql}", params)]
+
+    def _fit(self, values):
+        values = [("" if v is None else str(v)) for v in values][:NUM_COLS]
+        return values + [""] * (NUM_COLS - len(values))
+
+    def sync(self):
+        pass   # Chạy offline: SQLite là bản gốc
+
+    # --- ỨNG VIÊN ---
+    def list_candidates(self):
+        with self._lock:
+            return self._meta("candidate_header", CANDIDATE_HEADER), self._rows("ORDER BY row_num")
+
+    def candidates_since(self, row_num):
+        with self._lock:
+            return self._rows("WHERE row_num >= ? ORDER BY row_num", (row_num,))
+
+    def get_candidate_row(self, row_num):
+        with self._lock:
+            rows = self._rows("WHERE row_num = ?", (row_num,))
+            return rows[0] if rows else []
+
+    def find_by_phone(self, phone):
+        with self._lock:
+            row = self._db.execute("SELECT row_num FROM ung_vien WHERE sdt = ? LIMIT 1", (phone,)).fetchone()
+            return row[0] if row else None
+
+    def put_candidates(self, first_row, rows):
+        """Ghi các dòng vào đúng số dòng cho trước (dùng khi đồng bộ từ Sheets)."""
+        with self._lock, self._tx():
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO ung_vien (row_num, {', '.join(self._cols)}) VALUES (?{', ?' * NUM_COLS})",
+                [(first_row + i, *self._fit(r)) for i, r in enumerate(rows)])
+
+    def append_candidates(self, rows):
+        with self._lock:
+            first = (self._db.execute("SELECT MAX(row_num) FROM ung_vien").fetchone()[0] or 1) + 1
+            self.put_candidates(first, rows)
+            return first
+
+    def update_candidate_cells(self, row_num, changes):
+        with self._lock:
+            sets = ", ".join(f"c{col} = ?" for col in changes)
+            self._db.execute(f"UPDATE ung_vien SET {sets} WHERE row_num = ?",
+                             [stored_value(v) for v in changes.values()] + [row_num])
+
+    def write_candidate_ids(self, values):
+        with self._lock, self._tx():
+            header = self._meta("candidate_header", CANDIDATE_HEADER)
+            header = list(header) + [""] * (ID_COL - len(header)); header[ID_COL - 1] = values[0]
+            self._set_meta("candidate_header", header)
+            self._db.executemany(f"UPDATE ung_vien SET c{ID_COL} = ? WHERE row_num = ?",
+                                 [(v, i) for i, v in enumerate(values[1:], 2)])
+
+    def replace_candidates(self, header, rows):
+        with self._lock, self._tx():
+            self._db.execute("DELETE FROM ung_vien")
+            self._set_meta("candidate_header", header)
+            self.put_candidates(2, rows)
+
+    # --- TÀI KHOẢN ---
+    def list_users(self):
+        with self._lock:
+            header = self._meta("user_header", USER_HEADER)
+            return [dict(zip(header, json.loads(d))) for (d,) in self._db.execute("SELECT data FROM users ORDER BY row_num")]
+
+    def add_user(self, values):
+        with self._lock:
+            self._db.execute("INSERT INTO users (username, data) VALUES (?, ?)", (str(values[0]), json.dumps([str(v) for v in values])))
+
+    def update_user(self, username, col, value):
+        with self._lock:
+            row = self._db.execute("SELECT data FROM users WHERE username = ?", (username,)).fetchone()
+            if not row: return False
+            values = json.loads(row[0]); values += [""] * (col - len(values)); values[col - 1] = str(value)
+            self._db.execute("UPDATE users SET data = ? WHERE username = ?", (json.dumps(values), username))
+            return True
+
+    def replace_users(self, users):
+        with self._lock, self._tx():
+            header = list(users[0]) if users else USER_HEADER
+            self._db.execute("DELETE FROM users")
+            self._set_meta("user_header", header)
+            self._db.executemany("INSERT OR REPLACE INTO users (username, data) VALUES (?, ?)",
+                                 [(str(u.get(header[0], "")), json.dumps([str(u.get(h, "")) for h in header])) for u in users])
+
+    # --- NHẬT KÝ THAY ĐỔI ---
+    def put_events(self, first_row, events):
+        with self._lock, self._tx():
+            self._db.executemany("INSERT OR REPLACE INTO lich_su VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 [(first_row + i, *[str(v) for v in (list(e) + [""] * 6)[:6]]) for i, e in enumerate(events)])
+
+    def append_events(self, events):
+        if not events: return None
+        with self._lock:
+            first = (self._db.execute("SELECT MAX(row_num) FROM lich_su").fetchone()[0] or 1) + 1
+            self.put_events(first, events)
+            return first
+
+    def events_since(self, row_num):
+        with self._lock:
+            return [list(r) for r in self._db.execute(
+                "SELECT thoi_gian, ma_uv, nguoi_sua, truong, gia_tri_cu, gia_tri_moi FROM lich_su WHERE row_num >= ? ORDER BY row_num",
+                (row_num,))]
+
+    def replace_events(self, events):
+        with self._lock, self._tx():
+            self._db.execute("DELETE FROM lich_su")
+            self.put_events(2, events)
+
+
+class MirroredBackend:
+    """Đọc từ SQLite (vài ms), ghi vào Sheets trước (bản lưu bền vững) rồi vào SQLite.
+
+    sync() kéo toàn bộ Sheets về SQLite để nhận các thay đổi từ nơi khác;
+    start_sync() chạy việc này định kỳ ở luồng nền.
+    """
+
+    def __init__(self, local, remote):
+        self.local = local
+        self.remote = remote
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sync(self):
+        header, rows = self.remote.list_candidates()
+        self.local.replace_candidates(header, rows)
+        self.local.replace_users(self.remote.list_users())
+        self.local.replace_events(self.remote.events_since(2))
+
+    def start_sync(self, interval):
+        def loop():
+            while not self._stop.wait(interval):
+                try: self.sync()
+                except Exception as e: log.warning("Đồng bộ Sheets -> SQLite lỗi: %s", e)
+        if not self._thread:
+            self._thread = threading.Thread(target=loop, name="sheets-sync", daemon=True)
+            self._thread.start()
+
+    # Đọc: cục bộ. Riêng get_candidate_row dùng để kiểm tra sửa đồng thời nên phải đọc bản gốc.
+    def list_candidates(self): return self.local.list_candidates()
+    def candidates_since(self, row_num): return self.local.candidates_since(row_num)
+    def find_by_phone(self, phone): return self.local.find_by_phone(phone)
+    def list_users(self): return self.local.list_users()
+    def get_candidate_row(self, row_num): return self.remote.get_candidate_row(row_num)
+    def events_since(self, row_num): return self.local.events_since(row_num)
+
+    # Ghi: Sheets trước, rồi SQLite theo đúng số dòng Sheets đã cấp
+    def append_candidates(self, rows):
+        first = self.remote.append_candidates(rows)
+        if first: self.local.put_candidates(first, rows)
+        else: self.sync()
+        return first
+
+    def update_candidate_cells(self, row_num, changes):
+        self.remote.update_candidate_cells(row_num, changes)
+        self.local.update_candidate_cells(row_num, changes)
+
+    def write_candidate_ids(self, values):
+        self.remote.write_candidate_ids(values)
+        self.local.write_candidate_ids(values)
+
+    def add_user(self, values):
+        self.remote.add_user(values); self.local.add_user(values)
+
+    def update_user(self, username, col, value):
+        ok = self.remote.update_user(username, col, value)
+        if ok: self.local.update_user(username, col, value)
+        return ok
+
+    def append_events(self, events):
+        first = self.remote.append_events(events)
+        if first: self.local.put_events(first, events)
+        return first
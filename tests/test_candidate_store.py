@@ -0,0 +1,107 @@
+"""CandidateStore trên Google Sheets giả (benchmarks.fakes): gán mã MaUV, sửa mã trùng,
+phát hiện sửa đồng thời và ghi nền theo mã khi dòng trên sheet bị dời.
+
+Chạy: python -m pytest -q tests
+"""
+import pytest
+
+from benchmarks.fakes import FakeWorksheet
+from candidate_store import LINK_ANH_COL, CandidateStore, ConflictError, SchemaError
+from storage import CANDIDATE_HEADER, EVENT_HEADER, ID_COL, USER_HEADER, GSheetsBackend, legacy_id
+
+NOTE_COL = CANDIDATE_HEADER.index("GhiChu") + 1
+
+
+def candidate(name, candidate_id=""):
+    row = [""] * len(CANDIDATE_HEADER)
+    row[:9] = ["01/01/2025", name, "2000", "Hà Nội", "'0912345678", "'", "Công nhân", "Mới nhận", ""]
+    row[ID_COL - 1] = candidate_id
+    return row
+
+
+def make_store(header, rows):
+    ws = FakeWorksheet("UngVien", [header] + rows)
+    backend = GSheetsBackend(ws, FakeWorksheet("Users", [USER_HEADER]), FakeWorksheet("LichSu", [EVENT_HEADER]))
+    store = CandidateStore(backend, ttl=0)
+    store.resync()
+    return store, ws
+
+
+def column_s(ws):
+    return [r[ID_COL - 1] if len(r) >= ID_COL else "" for r in ws.values]
+
+
+def test_legacy_sheet_gets_ids():
+    # Sheet cũ 18 cột, chưa có cột MaUV
+    store, ws = make_store(CANDIDATE_HEADER[:ID_COL - 1], [candidate(n)[:ID_COL - 1] for n in "ABC"])
+    assert column_s(ws) == ["MaUV", legacy_id(2), legacy_id(3), legacy_id(4)]
+    assert ws.col_count >= ID_COL
+    assert [store.row_for_id(legacy_id(i)) for i in (2, 3, 4)] == [2, 3, 4]
+
+    # Lần tải sau đọc lại đúng các mã đã ghi, không gán mã mới
+    again, _ = make_store(ws.values[0], ws.values[1:])
+    assert again._id_index == store._id_index
+
+
+def test_occupied_id_column_is_not_overwritten():
+    header = CANDIDATE_HEADER[:ID_COL - 1] + ["Other"]
+    with pytest.raises(SchemaError):
+        make_store(header, [candidate("A", "extra"), candidate("B", "extra")])
+
+
+def test_duplicate_ids_are_repaired():
+    # Dòng 4 copy-paste từ dòng 2; dòng 3 chưa có mã nhưng mã theo số dòng đã thuộc về dòng 5
+    store, ws = make_store(CANDIDATE_HEADER, [candidate("A", "UVA"), candidate("B"), candidate("A", "UVA"),
+                                              candidate("D", legacy_id(3))])
+    ids = column_s(ws)[1:]
+    assert len(set(ids)) == 4
+    assert ids[0] == "UVA" and ids[3] == legacy_id(3)
+    assert all(store.row_for_id(cid) == i for i, cid in enumerate(ids, 2))
+
+    # Dòng copy-paste thêm vào sau khi đã tải cũng nhận mã mới (và được ghi lên sheet)
+    ws.values.append(candidate("A", "UVA"))
+    store.refresh()
+    new_id = column_s(ws)[-1]
+    assert new_id != "UVA" and store.row_for_id(new_id) == 6 and store.row_for_id("UVA") == 2
+
+
+def test_save_conflicts_with_other_edit_but_not_with_background_photo():
+    store, ws = make_store(CANDIDATE_HEADER, [candidate("A", "UVA"), candidate("B", "UVB")])
+
+    # Ảnh upload xong ở luồng nền trong lúc người dùng đang sửa hồ sơ: vẫn lưu được
+    seen = store.row_values(2)
+    assert store.update_cell("UVA", LINK_ANH_COL, "https://drive.google.com/open?id=photo")
+    store.update_row(2, seen, {NOTE_COL: "ghi chú"})
+    assert ws.values[1][NOTE_COL - 1] == "ghi chú"
+    assert store.row_values(2)[LINK_ANH_COL - 1] == ws.values[1][LINK_ANH_COL - 1] != ""
+
+    # Người khác sửa đúng cột đang lưu: không ghi đè, bộ nhớ nhận giá trị mới
+    seen = store.row_values(3)
+    ws.values[2][NOTE_COL - 1] = "người khác sửa"
+    with pytest.raises(ConflictError):
+        store.update_row(3, seen, {NOTE_COL: "của tôi"})
+    assert ws.values[2][NOTE_COL - 1] == "người khác sửa"
+    assert store.row_values(3)[NOTE_COL - 1] == "người khác sửa"
+
+
+def test_save_conflicts_when_row_moved():
+    store, ws = make_store(CANDIDATE_HEADER, [candidate("A", "UVA"), candidate("B", "UVB")])
+    seen = store.row_values(2)
+    ws.values[1], ws.values[2] = ws.values[2], ws.values[1]   # sắp xếp lại trên Sheets
+    with pytest.raises(ConflictError):
+        store.update_row(2, seen, {NOTE_COL: "của tôi"})
+    assert ws.values[1][NOTE_COL - 1] == ""
+
+
+def test_update_cell_follows_id_after_rows_shift():
+    store, ws = make_store(CANDIDATE_HEADER, [candidate(n, f"UV{n}") for n in "ABC"])
+    del ws.values[1]    # xóa hồ sơ A trên Sheets: B, C dời lên một dòng
+
+    assert store.update_cell("UVC", LINK_ANH_COL, "https://link/c")
+    assert [r[LINK_ANH_COL - 1] for r in ws.values[1:]] == ["", "https://link/c"]
+    assert store.row_for_id("UVC") == 3
+    assert store.row_values(3)[LINK_ANH_COL - 1] == "https://link/c"
+
+    # Hồ sơ đã bị xóa: không ghi vào dòng của người khác
+    assert not store.update_cell("UVA", LINK_ANH_COL, "https://link/a")
+    assert [r[LINK_ANH_COL - 1] for r in ws.values[1:]] == ["", "https://link/c"]
@@ -0,0 +1,168 @@
+"""Bộ đệm ảnh thẻ ứng viên phía server cho màn DANH SÁCH.
+
+Thay vì để mỗi trình duyệt tải ảnh Drive khổ 1000px cho ô hiển thị 100px,
+ảnh được tải một lần qua HTTP session dùng chung, thu nhỏ về đúng khổ hiển thị
+rồi giữ trong LRU bộ nhớ + LRU trên đĩa (giới hạn dung lượng), khóa theo id file
+Drive. Trang kế tiếp được tải trước ở luồng nền; ảnh lỗi/chưa có dùng ảnh giữ chỗ
+vẽ sẵn thay cho via.placeholder.com.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+from requests.adapters import HTTPAdapter
+from PIL import Image, ImageDraw, ImageOps
+
+from perf import span
+
+log = logging.getLogger(__name__)
+
+DISPLAY_SIZE = (200, 266)           # 2x khổ hiển thị 100px (màn hình độ phân giải cao)
+JPEG_QUALITY = 80
+TIMEOUT = (5, 15)
+MEMORY_BYTES = 32 * 1024 * 1024
+DISK_BYTES = 256 * 1024 * 1024
+FAILURE_TTL = 600                   # giây: không thử lại ảnh lỗi trong khoảng này
+WAIT = 20                           # giây chờ tối đa một ảnh đang tải
+
+_DRIVE_ID = re.compile(r"(?:[?&]id=|/d/)([\w-]{10,})")
+
+
+def cache_key(link):
+    """Id file Drive nếu là link Drive, ngược lại hash của URL."""
+    m = _DRIVE_ID.search(link)
+    return m.group(1) if m else hashlib.sha1(link.encode("utf-8")).hexdigest()
+
+
+def source_url(link):
+    m = _DRIVE_ID.search(link)
+    # Xin Drive đúng khổ cần dùng thay vì sz=w1000
+    return f"https://drive.google.com/thumbnail?id={m.group(1)}&sz=w{DISPLAY_SIZE[0]}" if m else link
+
+
+def downscale(data, size=DISPLAY_SIZE):
+    with Image.open(BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        img.thumbnail(size, Image.LANCZOS)
+        buf = BytesIO(); img.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        return buf.getvalue()
+
+
+def make_placeholder(size=DISPLAY_SIZE):
+    """Ảnh giữ chỗ: bóng người xám trên nền sáng."""
+    w, h = size
+    img = Image.new("RGB", size, (236, 239, 241))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((w * 0.32, h * 0.18, w * 0.68, h * 0.45), fill=(176, 190, 197))
+    draw.ellipse((w * 0.15, h * 0.52, w * 0.85, h * 1.05), fill=(176, 190, 197))
+    buf = BytesIO(); img.save(buf, "PNG", optimize=True)
+    return buf.getvalue()
+
+
+class ThumbnailCache:
+    def __init__(self, cache_dir, memory_bytes=MEMORY_BYTES, disk_bytes=DISK_BYTES, max_workers=6, adapter=None):
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._session = requests.Session()
+        self._session.mount("https://", adapter or HTTPAdapter(pool_connections=2, pool_maxsize=max_workers))
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail")
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()      # key -> bytes, cũ nhất ở đầu
+        self._memory_size = 0
+        self._inflight = {}               # key -> Future
+        self._failed = {}                 # key -> thời điểm lỗi
+        self._disk_size = sum(e.stat().st_size for e in os.scandir(cache_dir) if e.is_file())
+        self.placeholder = make_placeholder()
+
+    # --- BỘ NHỚ ---
+    def _remember(self, key, data):
+        with self._lock:
+            if key in self._memory: self._memory_size -= len(self._memory.pop(key))
+            self._memory[key] = data; self._memory_size += len(data)
+            while self._memory_size > self.memory_bytes and len(self._memory) > 1:
+                self._memory_size -= len(self._memory.popitem(last=False)[1])
+
+    def _from_memory(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None: self._memory.move_to_end(key)
+            return data
+
+    # --- ĐĨA ---
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+
+    def _from_disk(self, key):
+        try:
+            with open(self._path(key), "rb") as f: data = f.read()
+        except OSError:
+            return None
+        os.utime(self._path(key))     # mtime = lần dùng gần nhất (cho LRU)
+        return data
+
+    def _to_disk(self, key, data):
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "wb") as f: f.write(data)
+        os.replace(tmp, self._path(key))
+        with self._lock:
+            self._disk_size += len(data)
+            if self._disk_size <= self.disk_bytes: return
+            entries = sorted((e for e in os.scandir(self.cache_dir) if e.is_file()), key=lambda e: e.stat().st_mtime)
+            self._disk_size = sum(e.stat().st_size for e in entries)
+            for e in entries:
+                if self._disk_size <= self.disk_bytes * 0.9: break
+                try: os.remove(e.path); self._disk_size -= e.stat().st_size
+                except OSError: pass
+
+    # --- TẢI ---
+    def _fetch(self, key, link):
+        try:
+            data = self._from_disk(key)
+            if data is None:
+                with span("drive.thumbnail"):
+                    resp = self._session.get(source_url(link), timeout=TIMEOUT)
+                resp.raise_for_status()
+                data = downscale(resp.content)
+                self._to_disk(key, data)
+            self._remember(key, data)
+            return data
+        except Exception as e:
+            log.info("Không tải được ảnh %s: %s", link, e)
+            with self._lock: self._failed[key] = time.time()
+            return None
+        finally:
+            with self._lock: self._inflight.pop(key, None)
+
+    def _submit(self, link):
+        """Future của ảnh (None nếu đã có trong bộ nhớ hoặc vừa lỗi)."""
+        key = cache_key(link)
+        if self._from_memory(key) is not None: return None
+        with self._lock:
+            if time.time() - self._failed.get(key, 0) < FAILURE_TTL: return None
+            fut = self._inflight.get(key)
+            if fut is None: fut = self._inflight[key] = self._pool.submit(self._fetch, key, link)
+            return fut
+
+    def prefetch(self, links):
+        """Tải trước ở luồng nền (không chờ)."""
+        for link in links:
+            if link and link.startswith("http"): self._submit(link)
+
+    def get(self, link):
+        """Bytes ảnh đã thu nhỏ, hoặc ảnh giữ chỗ nếu không có link / tải lỗi."""
+        if not link or not link.startswith("http"): return self.placeholder
+        data = self._from_memory(cache_key(link))
+        if data is not None: return data
+        fut = self._submit(link)
+        try: data = fut.result(timeout=WAIT) if fut else self._from_memory(cache_key(link))
+        except Exception: data = None
+        return data or self.placeholder
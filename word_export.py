@@ -0,0 +1,162 @@
+"""Xuất hồ sơ ứng viên ra file Word (một hồ sơ, ZIP nhiều hồ sơ hoặc một file gộp).
+
+Font/cỡ chữ/căn lề được khai báo một lần trong file mẫu (style), mỗi hồ sơ
+chỉ việc mở mẫu và điền nội dung. Xuất hàng loạt chạy song song bằng process
+pool và ghi thẳng từng file vào ZIP trên đĩa tạm nên bộ nhớ không tăng theo số hồ sơ.
+"""
+import multiprocessing
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_BREAK
+from docx.oxml.ns import qn
+from docx.shared import Pt, RGBColor
+
+FONT = 'Times New Roman'
+FIELDS = ['HoTen', 'NamSinh', 'SDT', 'CCCD', 'QueQuan', 'ViTri', 'TrangThai', 'Nguồn', 'XeTuyen', 'KTX', 'GhiChu']
+PARALLEL_MIN = 20         # ít hồ sơ hơn thì làm tuần tự, không đáng khởi động process pool
+
+_template = None
+
+
+def _set_font(style, size=None, bold=None, italic=None):
+    font = style.font
+    font.name = FONT; font.color.rgb = RGBColor(0, 0, 0)
+    if size: font.size = Pt(size)
+    if bold is not None: font.bold = bold
+    if italic is not None: font.italic = italic
+    # Bỏ font theo theme (Heading/Title mặc định dùng theme -> Word bỏ qua font.name)
+    rfonts = style.element.rPr.rFonts
+    for attr in ('w:asciiTheme', 'w:hAnsiTheme', 'w:eastAsiaTheme', 'w:cstheme'):
+        rfonts.attrib.pop(qn(attr), None)
+    rfonts.set(qn('w:eastAsia'), FONT)
+
+
+def _build_template():
+    doc = Document()
+    styles = doc.styles
+    _set_font(styles['Normal'], 13)
+    _set_font(styles['Title'], 16, bold=True)
+    styles['Title'].paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    _set_font(styles['Heading 1'], 14)
+    for name, size, align in (('HS Sub', None, WD_ALIGN_PARAGRAPH.CENTER), ('HS Footer', 11, WD_ALIGN_PARAGRAPH.RIGHT)):
+        s = styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH); s.base_style = styles['Normal']
+        _set_font(s, size, italic=True); s.paragraph_format.alignment = align
+    s = styles.add_style('HS Line', WD_STYLE_TYPE.PARAGRAPH); s.base_style = styles['Normal']
+    s.paragraph_format.space_after = Pt(6)
+    # Bỏ các style không dùng tới -> mẫu nhỏ hơn, mở/lưu mỗi hồ sơ nhanh hơn
+    keep = {'Normal', 'Title', 'TitleChar', 'Heading1', 'Heading1Char', 'HSSub', 'HSFooter', 'HSLine',
+            'DefaultParagraphFont', 'TableNormal', 'NoList'}
+    root = styles.element
+    for el in list(root):
+        if el.tag == qn('w:latentStyles') or (el.tag == qn('w:style') and el.get(qn('w:styleId')) not in keep):
+            root.remove(el)
+    buf = BytesIO(); doc.save(buf)
+    return buf.getvalue()
+
+
+def new_document():
+    """Document rỗng đã có sẵn style (mẫu dựng một lần mỗi process)."""
+    global _template
+    if _template is None: _template = _build_template()
+    return Document(BytesIO(_template))
+
+
+def _para(doc, text, style_id):
+    # Gán thẳng style id: tra style theo tên trong python-docx phải duyệt cả bảng style mỗi lần
+    p = doc.add_paragraph(text); p._p.style = style_id
+    return p
+
+
+def fill_document(doc, data):
+    def add_line(label, value):
+        p = _para(doc, "", 'HSLine')
+        p.add_run(f"{label}: ").bold = True
+        p.add_run(str(value) if value else "")
+
+    _para(doc, f"HỒ SƠ ỨNG VIÊN: {data['HoTen']}", 'Title')
+    _para(doc, f"(Vị trí: {data['ViTri']} | Trạng thái: {data['TrangThai']})", 'HSSub')
+    doc.add_paragraph("")
+
+    _para(doc, 'I. THÔNG TIN CÁ NHÂN', 'Heading1')
+    add_line("Họ và tên", data['HoTen']); add_line("Ngày sinh", data['NamSinh'])
+    add_line("Số điện thoại", data['SDT']); add_line("CCCD", data.get('CCCD', ''))
+    add_line("Quê quán", data['QueQuan'])
+
+    _para(doc, 'II. THÔNG TIN KHÁC', 'Heading1')
+    add_line("Nguồn tuyển dụng", data.get('Nguồn', '')); add_line("Đăng ký xe tuyến", data.get('XeTuyen', ''))
+    add_line("Nhu cầu KTX", data.get('KTX', '')); add_line("Ghi chú hiện tại", data.get('GhiChu', ''))
+
+    doc.add_paragraph("")
+    _para(doc, f"Ngày xuất hồ sơ: {datetime.now().strftime('%d/%m/%Y')}", 'HSFooter')
+
+
+def render_docx(data):
+    """Bytes của file .docx cho một hồ sơ (hàm top-level để chạy được trong process pool)."""
+    doc = new_document(); fill_document(doc, data)
+    buf = BytesIO(); doc.save(buf)
+    return buf.getvalue()
+
+
+def create_word_file(data):
+    return BytesIO(render_docx(data))
+
+
+def to_record(data):
+    """Chỉ giữ các cột cần cho hồ sơ; bỏ dấu ' ép kiểu chữ của SĐT/CCCD (dòng append RAW)."""
+    return {k: str(data[k]).replace("'", "") if k in ('SDT', 'CCCD') else data[k] for k in FIELDS if k in data}
+
+
+def to_records(df):
+    """Như to_record cho cả DataFrame (giảm dữ liệu gửi sang process con)."""
+    cols = [c for c in FIELDS if c in df.columns]
+    return [to_record(r) for r in df[cols].to_dict("records")]
+
+
+def _file_name(i, data):
+    name = re.sub(r'[\\/:*?"<>|]+', "", str(data.get('HoTen', ''))).strip() or "HoSo"
+    return f"{i:04d}_{name}_{data.get('SDT', '')}.docx"
+
+
+def _render_all(records, max_workers=None):
+    if len(records) < PARALLEL_MIN:
+        yield from map(render_docx, records); return
+    # Không fork: server Streamlit đang chạy nhiều luồng (tornado, upload ảnh, ảnh thẻ,
+    # đồng bộ), process con fork ra có thể kẹt ở khóa của các luồng đó
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1),
+                             mp_context=multiprocessing.get_context(method)) as pool:
+        yield from pool.map(render_docx, records, chunksize=8)
+
+
+def export_zip(records, max_workers=None, on_progress=None):
+    """ZIP các file .docx, ghi dần vào file tạm. Trả về file object đã seek(0).
+
+    File tạm không buffer (file object thô) để truyền thẳng cho st.download_button. Bộ nhớ
+    chỉ phẳng trong lúc tạo: st.download_button vẫn đọc cả file vào bộ nhớ khi nhận.
+    """
+    out = tempfile.TemporaryFile(buffering=0)
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i, (data, content) in enumerate(zip(records, _render_all(records, max_workers)), 1):
+            zf.writestr(_file_name(i, data), content)
+            if on_progress: on_progress(i, len(records))
+    out.seek(0)
+    return out
+
+
+def export_merged(records, on_progress=None):
+    """Một file .docx gộp tất cả hồ sơ, mỗi hồ sơ một trang."""
+    doc = new_document()
+    for i, data in enumerate(records, 1):
+        if i > 1: doc.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+        fill_document(doc, data)
+        if on_progress: on_progress(i, len(records))
+    buf = BytesIO(); doc.save(buf); buf.seek(0)
+    return buf